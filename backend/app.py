@@ -1,51 +1,353 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify
 from flask_cors import CORS
-import json
+import atexit
 import os
 from datetime import datetime
 from html_updater import HTMLUpdater
 from git_manager import GitManager
+from config import config
+from content_store import ContentStore, serialize_json
+from storage import COLLECTIONS, create_storage
+from render_queue import RenderWorker
+from site_output import OutputBuilder
+from site_generator import SiteGenerator
+from file_watcher import FileWatcher
+from tailwind_build import TailwindBuild
+from publish_queue import PublishQueue
+from image_pipeline import ImagePipeline
+from http_cache import ResponseCache
+from metrics import metrics
+from query_index import decode_cursor
+from search_index import SearchIndex
+
+app_config = config[os.environ.get('FLASK_CONFIG', 'default')]
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this-in-production'
 CORS(app)
 
 # Initialize utilities
-html_updater = HTMLUpdater()
-git_manager = GitManager()
-
-# Data file paths
-DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
-REVIEWS_FILE = os.path.join(DATA_DIR, 'reviews.json')
-FAQS_FILE = os.path.join(DATA_DIR, 'faqs.json')
-GALLERY_FILE = os.path.join(DATA_DIR, 'gallery.json')
-REELS_FILE = os.path.join(DATA_DIR, 'reels.json')
-
-# Ensure data directory exists
-os.makedirs(DATA_DIR, exist_ok=True)
-
-# Helper functions to load/save data
-def load_json(file_path, default=None):
-    if default is None:
-        default = []
-    if os.path.exists(file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return default
-
-def save_json(file_path, data):
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-# Initialize JSON files if they don't exist
-if not os.path.exists(REVIEWS_FILE):
-    save_json(REVIEWS_FILE, [])
-if not os.path.exists(FAQS_FILE):
-    save_json(FAQS_FILE, [])
-if not os.path.exists(GALLERY_FILE):
-    save_json(GALLERY_FILE, [])
-if not os.path.exists(REELS_FILE):
-    save_json(REELS_FILE, [])
+metrics.enabled = app_config.METRICS_ENABLED
+html_updater = HTMLUpdater(
+    app_config.HTML_FILE,
+    render_mode=app_config.HTML_RENDER_MODE,
+    parser=app_config.HTML_PARSER,
+    card_cache_size=app_config.CARD_CACHE_SIZE
+)
+git_manager = GitManager(
+    repo_path=app_config.GIT_REPO_PATH,
+    publish_paths=app_config.GIT_PUBLISH_PATHS,
+    backend=app_config.GIT_BACKEND,
+    status_ttl=app_config.GIT_STATUS_TTL_SECONDS
+)
+content_store = ContentStore()
+storage = create_storage(app_config, content_store)
+search_index = SearchIndex(storage)
+response_cache = ResponseCache(
+    compress=app_config.RESPONSE_COMPRESSION,
+    min_size=app_config.RESPONSE_COMPRESS_MIN_BYTES
+)
+# In generator mode renders go to a page assembled under dist/ and index.html is only the template
+site_generator = SiteGenerator(
+    app_config.SITE_TEMPLATE,
+    app_config.BUILD_OUTPUT_DIR,
+    storage,
+    card_cache_size=app_config.CARD_CACHE_SIZE
+) if app_config.SITE_GENERATOR_ENABLED else None
+output_builder = OutputBuilder(
+    site_generator.page if site_generator else app_config.HTML_FILE,
+    app_config.BUILD_OUTPUT_DIR,
+    background=app_config.BUILD_IN_BACKGROUND,
+    tailwind=TailwindBuild(app_config.BUILD_OUTPUT_DIR, app_config.TAILWIND_CLI) if app_config.BUILD_TAILWIND else None,
+    base_dir=os.path.dirname(os.path.abspath(app_config.SITE_TEMPLATE))
+)
+atexit.register(output_builder.stop)
+render_worker = RenderWorker(
+    site_generator or html_updater,
+    storage,
+    debounce=app_config.RENDER_DEBOUNCE_SECONDS,
+    max_delay=app_config.RENDER_MAX_DELAY_SECONDS,
+    background=app_config.RENDER_IN_BACKGROUND,
+    on_change=git_manager.invalidate_status,
+    on_render=output_builder.request if app_config.BUILD_OUTPUT_ENABLED else None
+)
+atexit.register(render_worker.stop)
+if site_generator:
+    # Catch up with data edited since the last build; unchanged sections come from the cache
+    render_worker.request(*COLLECTIONS)
+publish_queue = PublishQueue(
+    git_manager,
+    app_config.GIT_PUBLISH_JOBS_FILE,
+    branch=app_config.GIT_BRANCH,
+    window=app_config.GIT_PUBLISH_WINDOW_SECONDS,
+    retries=app_config.GIT_PUSH_RETRIES,
+    backoff=app_config.GIT_PUSH_BACKOFF_SECONDS,
+    render_worker=render_worker,
+    output_builder=output_builder,
+    background=app_config.GIT_PUBLISH_IN_BACKGROUND
+)
+atexit.register(publish_queue.stop)
+# Finish publishes a worker process died in the middle of
+publish_queue.recover()
+
+def watched_files():
+    """Files edited outside the API that the backend follows: the JSON collections and the page"""
+    files = {}
+    if app_config.STORAGE_BACKEND == 'json':
+        files.update({storage.path(collection): collection for collection in COLLECTIONS})
+    files[app_config.SITE_TEMPLATE if site_generator else app_config.HTML_FILE] = 'page'
+    return files
+
+def is_own_write(path):
+    """Whether a changed file is one the backend wrote itself"""
+    key = file_watcher.files[path]
+    if key == 'page':
+        return html_updater.wrote_current()
+    return content_store.saved_current(storage.path(key))
+
+def reload_changed_files(keys):
+    """Reload the collections changed on disk and re-render only the sections showing them"""
+    collections = [key for key in keys if key in COLLECTIONS]
+    for collection in collections:
+        content_store.invalidate(storage.path(collection))
+    if 'page' in keys and site_generator:
+        # New template: every section comes from the cache unless its data changed too
+        collections = list(COLLECTIONS)
+    if collections:
+        render_worker.request(*collections)
+    elif 'page' in keys:
+        # index.html edited by hand: its regions stay as they are, only dist/ is rebuilt
+        git_manager.invalidate_status()
+        if app_config.BUILD_OUTPUT_ENABLED:
+            output_builder.request()
+
+file_watcher = FileWatcher(
+    watched_files(),
+    reload_changed_files,
+    debounce=app_config.FILE_WATCHER_DEBOUNCE_SECONDS,
+    poll_interval=app_config.FILE_WATCHER_POLL_SECONDS,
+    is_own_write=is_own_write
+) if app_config.FILE_WATCHER_ENABLED else None
+if file_watcher:
+    atexit.register(file_watcher.stop)
+
+def store_image_derivatives(image_id, url, derivatives):
+    """Attach generated derivatives to a gallery image, unless its URL changed meanwhile"""
+    image = storage.get('gallery', image_id)
+    if image and image.get('url') == url:
+        storage.update('gallery', image_id, {'derivatives': derivatives})
+        render_worker.request('gallery')
+
+image_pipeline = ImagePipeline(
+    os.path.dirname(app_config.HTML_FILE),
+    app_config.IMAGE_OUTPUT_DIR,
+    widths=app_config.IMAGE_WIDTHS,
+    formats=app_config.IMAGE_FORMATS,
+    max_workers=app_config.IMAGE_WORKERS,
+    on_done=store_image_derivatives,
+    enabled=app_config.IMAGE_PIPELINE_ENABLED
+)
+# Let running resizes finish (and store their derivatives) before the render worker stops
+atexit.register(image_pipeline.shutdown)
+
+def not_found(name):
+    return jsonify({'success': False, 'error': f'{name} not found'}), 404
+
+def json_response(collection):
+    """Serve a whole collection as JSON without encoding it again, with ETag and compression"""
+    return response_cache.response(collection, storage.list_json(collection))
+
+# Query parameters of the list endpoints; any others (e.g. a ?_= cache-buster) are ignored
+LIST_PARAMS = ('category', 'min_rating', 'sort', 'fields', 'limit', 'offset', 'cursor')
+
+def list_response(collection):
+    """GET handler of the list endpoints
+    
+    Without (non-empty) list parameters the whole collection is served from
+    cache. Otherwise supports category=, min_rating=, sort=[-]field,
+    fields=a,b and limit= with offset= or cursor=; paginated results come
+    wrapped as {'items', 'total', 'offset', 'limit', 'next_cursor'}. Both
+    get an ETag and compression.
+    """
+    args = {name: request.args[name] for name in LIST_PARAMS if request.args.get(name)}
+    if not args:
+        return json_response(collection)
+    
+    try:
+        equals = {'category': args['category']} if 'category' in args else {}
+        minimum = {'rating': float(args['min_rating'])} if 'min_rating' in args else {}
+        sort = args.get('sort', 'id')
+        descending = sort.startswith('-')
+        sort = sort.lstrip('-')
+        limit = int(args['limit']) if 'limit' in args else None
+        offset = int(args.get('offset', 0))
+        if (limit is not None and not 1 <= limit <= app_config.MAX_PAGE_SIZE) or offset < 0:
+            raise ValueError(f'limit must be between 1 and {app_config.MAX_PAGE_SIZE}, offset must not be negative')
+        after = decode_cursor(args['cursor'], sort) if 'cursor' in args else None
+        items, total, next_cursor = storage.query(
+            collection, equals=equals, minimum=minimum, sort=sort, descending=descending,
+            offset=offset, limit=limit, after=after
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if 'fields' in args:
+        names = ['id'] + [name.strip() for name in args['fields'].split(',') if name.strip()]
+        items = [{name: item[name] for name in names if name in item} for item in items]
+    
+    if limit is None and 'cursor' not in args and 'offset' not in args:
+        return response_cache.response(None, serialize_json(items))
+    page = {'items': items, 'total': total, 'offset': offset, 'limit': limit, 'next_cursor': next_cursor}
+    return response_cache.response(None, serialize_json(page))
+
+def admin_page(collection):
+    """One page of a collection for the admin templates: (items, page, page count)"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    items, total, _ = storage.query(
+        collection, offset=(page - 1) * app_config.ADMIN_PAGE_SIZE, limit=app_config.ADMIN_PAGE_SIZE
+    )
+    pages = max(1, -(-total // app_config.ADMIN_PAGE_SIZE))
+    return items, page, pages
+
+# ========== RECORD BUILDERS ==========
+
+def new_review_fields(data):
+    return {
+        'name': data.get('name'),
+        'initial': data.get('initial'),
+        'rating': data.get('rating', 5),
+        'time': data.get('time', '3 months ago'),
+        'title': data.get('title'),
+        'content': data.get('content'),
+        'badge': data.get('badge', ''),
+        'created_at': datetime.now().isoformat()
+    }
+
+def updated_review_fields(existing, data):
+    return {
+        'name': data.get('name', existing['name']),
+        'initial': data.get('initial', existing['initial']),
+        'rating': data.get('rating', existing['rating']),
+        'time': data.get('time', existing['time']),
+        'title': data.get('title', existing['title']),
+        'content': data.get('content', existing['content']),
+        'badge': data.get('badge', existing.get('badge', '')),
+        'updated_at': datetime.now().isoformat()
+    }
+
+def new_faq_fields(data):
+    return {
+        'question': data.get('question'),
+        'answer': data.get('answer'),
+        'created_at': datetime.now().isoformat()
+    }
+
+def updated_faq_fields(existing, data):
+    return {
+        'question': data.get('question', existing['question']),
+        'answer': data.get('answer', existing['answer']),
+        'updated_at': datetime.now().isoformat()
+    }
+
+def new_image_fields(data):
+    return {
+        'url': data.get('url'),
+        'category': data.get('category', 'weddings'),
+        'alt': data.get('alt', 'Gallery image'),
+        'created_at': datetime.now().isoformat()
+    }
+
+def updated_image_fields(existing, data):
+    fields = {
+        'url': data.get('url', existing['url']),
+        'category': data.get('category', existing['category']),
+        'alt': data.get('alt', existing['alt']),
+        'updated_at': datetime.now().isoformat()
+    }
+    if fields['url'] != existing['url']:
+        # Derivatives belong to the old image
+        fields['derivatives'] = None
+    return fields
+
+def new_reel_fields(data):
+    return {
+        'embed_url': data.get('embed_url'),
+        'title': data.get('title', 'Instagram Reel'),
+        'created_at': datetime.now().isoformat()
+    }
+
+def updated_reel_fields(existing, data):
+    return {
+        'embed_url': data.get('embed_url', existing['embed_url']),
+        'title': data.get('title', existing['title']),
+        'updated_at': datetime.now().isoformat()
+    }
+
+# Collection -> (display name, create builder, update builder, fields required on create)
+CONTENT_TYPES = {
+    'reviews': ('Review', new_review_fields, updated_review_fields, ['name', 'content']),
+    'faqs': ('FAQ', new_faq_fields, updated_faq_fields, ['question', 'answer']),
+    'gallery': ('Image', new_image_fields, updated_image_fields, ['url']),
+    'reels': ('Reel', new_reel_fields, updated_reel_fields, ['embed_url']),
+}
+
+def plan_bulk_operation(collection, operation, touched_ids):
+    """Validate one bulk operation and turn it into a storage operation
+    
+    Returns (storage_operation, None) or (None, error message).
+    """
+    name, new_fields, updated_fields, required = CONTENT_TYPES[collection]
+    if not isinstance(operation, dict):
+        return None, 'Operation must be an object'
+    
+    op = operation.get('op')
+    data = operation.get('data', {})
+    if not isinstance(data, dict):
+        return None, "'data' must be an object"
+    
+    if op == 'create':
+        missing = [field for field in required if not data.get(field)]
+        if missing:
+            return None, f"Missing required field(s): {', '.join(missing)}"
+        return ('create', new_fields(data)), None
+    
+    if op not in ('update', 'delete'):
+        return None, "'op' must be one of: create, update, delete"
+    
+    item_id = operation.get('id')
+    if not isinstance(item_id, int) or isinstance(item_id, bool):
+        return None, "'id' must be an integer"
+    if item_id in touched_ids:
+        return None, f'{name} {item_id} appears more than once'
+    existing = storage.get(collection, item_id)
+    if not existing:
+        return None, f'{name} {item_id} not found'
+    touched_ids.add(item_id)
+    
+    if op == 'update':
+        return ('update', item_id, updated_fields(existing, data)), None
+    return ('delete', item_id), None
+
+# ========== REQUEST TIMING ==========
+
+@app.before_request
+def start_file_watcher():
+    # Started by the first request, so the debug reloader's parent process never watches
+    if file_watcher:
+        file_watcher.start()
+
+@app.before_request
+def start_timing():
+    if metrics.enabled:
+        metrics.start_request()
+
+@app.after_request
+def add_server_timing(response):
+    if metrics.enabled:
+        server_timing = metrics.finish_request(request.method, request.endpoint, response.status_code)
+        if server_timing:
+            response.headers['Server-Timing'] = server_timing
+    return response
 
 # ========== ROUTES ==========
 
@@ -57,36 +359,22 @@ def index():
 
 @app.route('/reviews')
 def reviews_manager():
-    reviews = load_json(REVIEWS_FILE)
-    return render_template('reviews.html', reviews=reviews)
+    reviews, page, pages = admin_page('reviews')
+    return render_template('reviews.html', reviews=reviews, page=page, pages=pages)
 
 @app.route('/api/reviews', methods=['GET'])
 def get_reviews():
-    reviews = load_json(REVIEWS_FILE)
-    return jsonify(reviews)
+    return list_response('reviews')
 
 @app.route('/api/reviews', methods=['POST'])
 def add_review():
     data = request.json
-    reviews = load_json(REVIEWS_FILE)
     
-    new_review = {
-        'id': len(reviews) + 1,
-        'name': data.get('name'),
-        'initial': data.get('initial'),
-        'rating': data.get('rating', 5),
-        'time': data.get('time', '3 months ago'),
-        'title': data.get('title'),
-        'content': data.get('content'),
-        'badge': data.get('badge', ''),
-        'created_at': datetime.now().isoformat()
-    }
+    new_review = storage.insert('reviews', new_review_fields(data))
+    search_index.index('reviews', new_review)
     
-    reviews.append(new_review)
-    save_json(REVIEWS_FILE, reviews)
-    
-    # Update HTML
-    html_updater.update_reviews(reviews)
+    # Schedule HTML update
+    render_worker.request('reviews')
     
     flash('Review added successfully!', 'success')
     return jsonify({'success': True, 'review': new_review})
@@ -94,34 +382,25 @@ def add_review():
 @app.route('/api/reviews/<int:review_id>', methods=['PUT'])
 def update_review(review_id):
     data = request.json
-    reviews = load_json(REVIEWS_FILE)
-    
-    for review in reviews:
-        if review['id'] == review_id:
-            review.update({
-                'name': data.get('name', review['name']),
-                'initial': data.get('initial', review['initial']),
-                'rating': data.get('rating', review['rating']),
-                'time': data.get('time', review['time']),
-                'title': data.get('title', review['title']),
-                'content': data.get('content', review['content']),
-                'badge': data.get('badge', review.get('badge', '')),
-                'updated_at': datetime.now().isoformat()
-            })
-            break
-    
-    save_json(REVIEWS_FILE, reviews)
-    html_updater.update_reviews(reviews)
+    review = storage.get('reviews', review_id)
+    if not review:
+        return not_found('Review')
+    
+    updated_review = storage.update('reviews', review_id, updated_review_fields(review, data))
+    if updated_review:
+        search_index.index('reviews', updated_review)
+    
+    render_worker.request('reviews')
     
     return jsonify({'success': True})
 
 @app.route('/api/reviews/<int:review_id>', methods=['DELETE'])
 def delete_review(review_id):
-    reviews = load_json(REVIEWS_FILE)
-    reviews = [r for r in reviews if r['id'] != review_id]
-    save_json(REVIEWS_FILE, reviews)
+    if not storage.delete('reviews', review_id):
+        return not_found('Review')
+    search_index.remove('reviews', review_id)
     
-    html_updater.update_reviews(reviews)
+    render_worker.request('reviews')
     
     return jsonify({'success': True})
 
@@ -129,59 +408,46 @@ def delete_review(review_id):
 
 @app.route('/faqs')
 def faqs_manager():
-    faqs = load_json(FAQS_FILE)
+    faqs = storage.list('faqs')
     return render_template('faqs.html', faqs=faqs)
 
 @app.route('/api/faqs', methods=['GET'])
 def get_faqs():
-    faqs = load_json(FAQS_FILE)
-    return jsonify(faqs)
+    return list_response('faqs')
 
 @app.route('/api/faqs', methods=['POST'])
 def add_faq():
     data = request.json
-    faqs = load_json(FAQS_FILE)
     
-    new_faq = {
-        'id': len(faqs) + 1,
-        'question': data.get('question'),
-        'answer': data.get('answer'),
-        'created_at': datetime.now().isoformat()
-    }
+    new_faq = storage.insert('faqs', new_faq_fields(data))
+    search_index.index('faqs', new_faq)
     
-    faqs.append(new_faq)
-    save_json(FAQS_FILE, faqs)
-    
-    html_updater.update_faqs(faqs)
+    render_worker.request('faqs')
     
     return jsonify({'success': True, 'faq': new_faq})
 
 @app.route('/api/faqs/<int:faq_id>', methods=['PUT'])
 def update_faq(faq_id):
     data = request.json
-    faqs = load_json(FAQS_FILE)
+    faq = storage.get('faqs', faq_id)
+    if not faq:
+        return not_found('FAQ')
     
-    for faq in faqs:
-        if faq['id'] == faq_id:
-            faq.update({
-                'question': data.get('question', faq['question']),
-                'answer': data.get('answer', faq['answer']),
-                'updated_at': datetime.now().isoformat()
-            })
-            break
+    updated_faq = storage.update('faqs', faq_id, updated_faq_fields(faq, data))
+    if updated_faq:
+        search_index.index('faqs', updated_faq)
     
-    save_json(FAQS_FILE, faqs)
-    html_updater.update_faqs(faqs)
+    render_worker.request('faqs')
     
     return jsonify({'success': True})
 
 @app.route('/api/faqs/<int:faq_id>', methods=['DELETE'])
 def delete_faq(faq_id):
-    faqs = load_json(FAQS_FILE)
-    faqs = [f for f in faqs if f['id'] != faq_id]
-    save_json(FAQS_FILE, faqs)
+    if not storage.delete('faqs', faq_id):
+        return not_found('FAQ')
+    search_index.remove('faqs', faq_id)
     
-    html_updater.update_faqs(faqs)
+    render_worker.request('faqs')
     
     return jsonify({'success': True})
 
@@ -189,61 +455,45 @@ def delete_faq(faq_id):
 
 @app.route('/gallery')
 def gallery_manager():
-    gallery = load_json(GALLERY_FILE)
-    return render_template('gallery.html', gallery=gallery)
+    gallery, page, pages = admin_page('gallery')
+    return render_template('gallery.html', gallery=gallery, page=page, pages=pages)
 
 @app.route('/api/gallery', methods=['GET'])
 def get_gallery():
-    gallery = load_json(GALLERY_FILE)
-    return jsonify(gallery)
+    return list_response('gallery')
 
 @app.route('/api/gallery', methods=['POST'])
 def add_gallery_image():
     data = request.json
-    gallery = load_json(GALLERY_FILE)
     
-    new_image = {
-        'id': len(gallery) + 1,
-        'url': data.get('url'),
-        'category': data.get('category', 'weddings'),
-        'alt': data.get('alt', 'Gallery image'),
-        'created_at': datetime.now().isoformat()
-    }
-    
-    gallery.append(new_image)
-    save_json(GALLERY_FILE, gallery)
+    new_image = storage.insert('gallery', new_image_fields(data))
+    image_pipeline.submit(new_image)
     
-    html_updater.update_gallery(gallery)
+    render_worker.request('gallery')
     
     return jsonify({'success': True, 'image': new_image})
 
 @app.route('/api/gallery/<int:image_id>', methods=['PUT'])
 def update_gallery_image(image_id):
     data = request.json
-    gallery = load_json(GALLERY_FILE)
+    image = storage.get('gallery', image_id)
+    if not image:
+        return not_found('Image')
     
-    for image in gallery:
-        if image['id'] == image_id:
-            image.update({
-                'url': data.get('url', image['url']),
-                'category': data.get('category', image['category']),
-                'alt': data.get('alt', image['alt']),
-                'updated_at': datetime.now().isoformat()
-            })
-            break
+    updated_image = storage.update('gallery', image_id, updated_image_fields(image, data))
+    if updated_image and not (updated_image.get('derivatives') or {}).get('placeholder'):
+        image_pipeline.submit(updated_image)
     
-    save_json(GALLERY_FILE, gallery)
-    html_updater.update_gallery(gallery)
+    render_worker.request('gallery')
     
     return jsonify({'success': True})
 
 @app.route('/api/gallery/<int:image_id>', methods=['DELETE'])
 def delete_gallery_image(image_id):
-    gallery = load_json(GALLERY_FILE)
-    gallery = [img for img in gallery if img['id'] != image_id]
-    save_json(GALLERY_FILE, gallery)
+    if not storage.delete('gallery', image_id):
+        return not_found('Image')
     
-    html_updater.update_gallery(gallery)
+    render_worker.request('gallery')
     
     return jsonify({'success': True})
 
@@ -251,62 +501,131 @@ def delete_gallery_image(image_id):
 
 @app.route('/reels')
 def reels_manager():
-    reels = load_json(REELS_FILE)
+    reels = storage.list('reels')
     return render_template('reels.html', reels=reels)
 
 @app.route('/api/reels', methods=['GET'])
 def get_reels():
-    reels = load_json(REELS_FILE)
-    return jsonify(reels)
+    return list_response('reels')
 
 @app.route('/api/reels', methods=['POST'])
 def add_reel():
     data = request.json
-    reels = load_json(REELS_FILE)
     
-    new_reel = {
-        'id': len(reels) + 1,
-        'embed_url': data.get('embed_url'),
-        'title': data.get('title', 'Instagram Reel'),
-        'created_at': datetime.now().isoformat()
-    }
+    new_reel = storage.insert('reels', new_reel_fields(data))
     
-    reels.append(new_reel)
-    save_json(REELS_FILE, reels)
-    
-    html_updater.update_reels(reels)
+    render_worker.request('reels')
     
     return jsonify({'success': True, 'reel': new_reel})
 
 @app.route('/api/reels/<int:reel_id>', methods=['PUT'])
 def update_reel(reel_id):
     data = request.json
-    reels = load_json(REELS_FILE)
+    reel = storage.get('reels', reel_id)
+    if not reel:
+        return not_found('Reel')
     
-    for reel in reels:
-        if reel['id'] == reel_id:
-            reel.update({
-                'embed_url': data.get('embed_url', reel['embed_url']),
-                'title': data.get('title', reel['title']),
-                'updated_at': datetime.now().isoformat()
-            })
-            break
+    storage.update('reels', reel_id, updated_reel_fields(reel, data))
     
-    save_json(REELS_FILE, reels)
-    html_updater.update_reels(reels)
+    render_worker.request('reels')
     
     return jsonify({'success': True})
 
 @app.route('/api/reels/<int:reel_id>', methods=['DELETE'])
 def delete_reel(reel_id):
-    reels = load_json(REELS_FILE)
-    reels = [r for r in reels if r['id'] != reel_id]
-    save_json(REELS_FILE, reels)
+    if not storage.delete('reels', reel_id):
+        return not_found('Reel')
     
-    html_updater.update_reels(reels)
+    render_worker.request('reels')
     
     return jsonify({'success': True})
 
+# ========== BULK ROUTES ==========
+
+@app.route('/api/<collection>/bulk', methods=['POST'])
+def bulk_update(collection):
+    """Apply many create/update/delete operations with one storage write and one render
+    
+    Body: {"operations": [{"op": "create", "data": {...}},
+                          {"op": "update", "id": 3, "data": {...}},
+                          {"op": "delete", "id": 4}]}
+    
+    Every operation is validated first; if any is invalid nothing is applied.
+    """
+    if collection not in CONTENT_TYPES:
+        return not_found('Collection')
+    
+    data = request.get_json(silent=True)
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'success': False, 'error': "'operations' must be a non-empty list"}), 400
+    
+    planned = []
+    results = []
+    touched_ids = set()
+    for index, operation in enumerate(operations):
+        storage_operation, error = plan_bulk_operation(collection, operation, touched_ids)
+        op = operation.get('op') if isinstance(operation, dict) else None
+        results.append({'index': index, 'op': op, 'success': error is None, 'error': error})
+        planned.append(storage_operation)
+    
+    if any(not result['success'] for result in results):
+        return jsonify({
+            'success': False,
+            'error': 'Validation failed, no changes were applied',
+            'results': results
+        }), 400
+    
+    applied = storage.apply_batch(collection, planned)
+    for result, item in zip(results, applied):
+        del result['error']
+        if item is None:
+            result.update({'success': False, 'error': 'Record no longer exists'})
+        else:
+            result['id'] = item['id']
+            if result['op'] != 'delete':
+                result['item'] = item
+                search_index.index(collection, item)
+            else:
+                search_index.remove(collection, item['id'])
+    
+    if collection == 'gallery':
+        for item in applied:
+            if item and 'url' in item and not (item.get('derivatives') or {}).get('placeholder'):
+                image_pipeline.submit(item)
+    
+    render_worker.request(collection)
+    
+    return jsonify({'success': all(result['success'] for result in results), 'results': results})
+
+# ========== SEARCH ROUTES ==========
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """Ranked matches of ?q= in reviews and FAQs (?type=reviews|faqs to narrow, ?limit=)"""
+    query = request.args.get('q', '')
+    collection = request.args.get('type')
+    if collection and collection not in search_index.fields:
+        return jsonify({'success': False, 'error': "type must be 'reviews' or 'faqs'"}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), app_config.MAX_PAGE_SIZE)
+    
+    results = search_index.search(query, [collection] if collection else None, limit)
+    return jsonify({'success': True, 'query': query, 'results': results})
+
+# ========== RENDER ROUTES ==========
+
+@app.route('/api/render/status', methods=['GET'])
+def render_status():
+    status = render_worker.status()
+    status['html_parser'] = html_updater.parser
+    status['html_parser_note'] = html_updater.parser_note
+    status['card_cache'] = (site_generator.cards if site_generator else html_updater).card_cache_status()
+    status['site_generator'] = site_generator.status() if site_generator else None
+    status['file_watcher'] = file_watcher.status() if file_watcher else None
+    status['build'] = output_builder.status()
+    status['image_errors'] = image_pipeline.errors()
+    return jsonify({'success': True, 'status': status})
+
 # ========== GIT ROUTES ==========
 
 @app.route('/git/push', methods=['POST'])
@@ -314,19 +633,31 @@ def git_push():
     data = request.json
     commit_message = data.get('message', 'Update website content')
     
-    try:
-        result = git_manager.commit_and_push(commit_message)
-        return jsonify({'success': True, 'message': result})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    job = publish_queue.submit(commit_message)
+    return jsonify({'success': True, 'message': 'Publish queued', 'job': job}), 202
+
+@app.route('/git/publish/<job_id>', methods=['GET'])
+def git_publish_status(job_id):
+    job = publish_queue.job(job_id)
+    if not job:
+        return not_found('Publish job')
+    return jsonify({'success': True, 'job': job})
 
 @app.route('/git/status', methods=['GET'])
 def git_status():
     try:
-        status = git_manager.get_status()
+        status = git_manager.status()
         return jsonify({'success': True, 'status': status})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ========== METRICS ROUTES ==========
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    if not metrics.enabled:
+        return not_found('Metrics')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,153 @@
+import json
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+# The umask can only be read by setting it, which races with threads creating
+# files meanwhile, so it is read once, at import
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+class _PathLock:
+    """Per-path lock state shared by every thread of the process"""
+    
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.shared = False
+        self.fd = None
+
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+def lock_path_for(path):
+    """Sidecar file used to lock path: <dir>/.<name>.lock"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f'.{name}.lock')
+
+def _get_path_lock(path):
+    lock_path = lock_path_for(path)
+    with _path_locks_guard:
+        if lock_path not in _path_locks:
+            _path_locks[lock_path] = _PathLock(lock_path)
+        return _path_locks[lock_path]
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Reader/writer lock on a file, across threads and processes
+    
+    Threads of one process take turns on an RLock; processes coordinate with
+    fcntl.flock on a sidecar lock file (shared for readers, exclusive for
+    writers). The lock is re-entrant: nested calls in the same thread reuse
+    the outer lock, upgrading it to exclusive if needed.
+    """
+    lock = _get_path_lock(path)
+    with lock.thread_lock:
+        if lock.depth == 0:
+            lock.fd = os.open(lock.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl:
+                fcntl.flock(lock.fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            lock.shared = shared
+        elif lock.shared and not shared:
+            if fcntl:
+                fcntl.flock(lock.fd, fcntl.LOCK_EX)
+            lock.shared = False
+        
+        lock.depth += 1
+        try:
+            yield
+        finally:
+            lock.depth -= 1
+            if lock.depth == 0:
+                if fcntl:
+                    fcntl.flock(lock.fd, fcntl.LOCK_UN)
+                os.close(lock.fd)
+                lock.fd = None
+
+def atomic_write(path, content, encoding='utf-8'):
+    """Replace a file in one step: write a temp file, fsync it, then os.replace
+    
+    Readers see either the old or the new file, never a partial one, even if
+    the process dies mid-write. Text is encoded as-is, without newline
+    translation.
+    """
+    data = content.encode(encoding) if isinstance(content, str) else content
+    directory, name = os.path.split(os.path.abspath(path))
+    
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    
+    # Make the rename itself durable
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+# Stamps are overwritten in place at a fixed size: replacing a file by rename or truncation
+# makes ext4 flush the new data first, which costs as much as an fsync
+STAMP_SIZE = 128
+
+def write_stamp_path_for(path):
+    """Sidecar recording the backend's last write of path: <dir>/.<name>.written"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f'.{name}.written')
+
+def file_signature(path):
+    """(mtime, size, inode) of a file, None if it does not exist"""
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino]
+
+def record_write(path):
+    """Note that the backend wrote path, for every process (see is_recorded_write)
+    
+    Call it holding file_lock(path), right after writing the file. The
+    stamp is neither fsynced nor replaced atomically: one lost or torn in a
+    crash costs a single redundant render.
+    """
+    stamp = json.dumps(file_signature(path)).ljust(STAMP_SIZE).encode('ascii')
+    fd = os.open(write_stamp_path_for(path), os.O_WRONLY | os.O_CREAT, 0o666)
+    try:
+        os.write(fd, stamp)
+    finally:
+        os.close(fd)
+
+def is_recorded_write(path):
+    """Whether path on disk is the version a backend process last wrote, not an outside edit"""
+    with file_lock(path, shared=True):
+        try:
+            with open(write_stamp_path_for(path), 'r', encoding='utf-8') as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            return False
+        signature = file_signature(path)
+    return signature is not None and recorded == signature
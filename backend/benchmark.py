@@ -0,0 +1,295 @@
+"""
+Micro-benchmarks for Shiv's Photography Backend
+
+Times the hot paths of an edit - rendering index.html, building cards,
+loading and saving collections, and full API round trips through the Flask
+test client - against synthetic data of growing size. Everything runs in a
+temporary copy of the site; the real index.html and data/ are never touched.
+
+For every benchmark and size it reports the latency distribution (ms) and
+the peak memory allocated by one call (tracemalloc).
+
+Usage:
+    python benchmark.py                             # sizes 10,100,1000
+    python benchmark.py --sizes 100,5000 --repeat 50
+    python benchmark.py --save baseline.json        # keep the results
+    python benchmark.py --compare baseline.json     # flag slowdowns against a saved run
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SITE_HTML = os.path.join(BASE_DIR, '..', 'index.html')
+
+WORDS = (
+    'wedding photography beautiful moments captured candid portraits couple family '
+    'reception ceremony bride groom album memories lighting professional friendly '
+    'recommend amazing experience team delivered stunning quality timely creative'
+).split()
+CATEGORIES = ['weddings', 'pre-wedding', 'events', 'portraits']
+
+# ========== SYNTHETIC DATA ==========
+
+def sentence(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count)).capitalize()
+
+def make_review(rng):
+    name = f'{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}'
+    return {
+        'name': name,
+        'initial': name[0],
+        'rating': rng.randint(3, 5),
+        'time': f'{rng.randint(1, 11)} months ago',
+        'title': sentence(rng, 4),
+        'content': sentence(rng, 40),
+        'badge': rng.choice(['', 'Local Guide']),
+        'created_at': datetime(2025, rng.randint(1, 12), rng.randint(1, 28)).isoformat()
+    }
+
+def make_faq(rng):
+    return {
+        'question': sentence(rng, 8) + '?',
+        'answer': sentence(rng, 30),
+        'created_at': datetime(2025, rng.randint(1, 12), rng.randint(1, 28)).isoformat()
+    }
+
+def make_image(rng, index):
+    image = {
+        'url': f'images/gallery/photo-{index}.jpg',
+        'category': rng.choice(CATEGORIES),
+        'alt': sentence(rng, 5),
+        'created_at': datetime(2025, rng.randint(1, 12), rng.randint(1, 28)).isoformat()
+    }
+    # Half of the images come with responsive derivatives, as processed uploads do
+    if index % 2:
+        key = f'{index:016x}'
+        image['derivatives'] = {
+            'hash': key * 4,
+            'width': 1600,
+            'height': 1067,
+            'aspect_ratio': 1.4995,
+            'dominant_color': '#8a7b6c',
+            'placeholder': 'data:image/webp;base64,' + 'A' * 120,
+            'sources': {
+                fmt: [{'url': f'images/generated/{key}-{w}.{fmt}', 'width': w} for w in (480, 960, 1600)]
+                for fmt in ('avif', 'webp', 'jpeg')
+            }
+        }
+    return image
+
+def make_reel(rng, index):
+    return {'embed_url': f'https://www.instagram.com/reel/C{index:09d}/embed', 'title': sentence(rng, 3)}
+
+def make_dataset(n, seed=0):
+    """n records of every collection"""
+    rng = random.Random(seed)
+    return {
+        'reviews': [make_review(rng) for _ in range(n)],
+        'faqs': [make_faq(rng) for _ in range(n)],
+        'gallery': [make_image(rng, i) for i in range(n)],
+        'reels': [make_reel(rng, i) for i in range(n)],
+    }
+
+# ========== MEASUREMENT ==========
+
+def percentile(sorted_samples, fraction):
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+def measure(function, repeat):
+    """Latency distribution (ms) over `repeat` calls, plus the peak memory of one more call"""
+    function()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    samples.sort()
+    return {
+        'samples': repeat,
+        'min': round(samples[0], 4),
+        'mean': round(statistics.fmean(samples), 4),
+        'p50': round(percentile(samples, 0.5), 4),
+        'p90': round(percentile(samples, 0.9), 4),
+        'p99': round(percentile(samples, 0.99), 4),
+        'max': round(samples[-1], 4),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+# ========== BENCHMARKS ==========
+
+def load_backend(workdir):
+    """Import the Flask app configured to use a scratch copy of the site"""
+    shutil.copy(SITE_HTML, os.path.join(workdir, 'index.html'))
+    os.environ.update({
+        'FLASK_CONFIG': 'testing',
+        'DATA_DIR': os.path.join(workdir, 'data'),
+        'HTML_FILE': os.path.join(workdir, 'index.html'),
+        'SQLITE_DATABASE': os.path.join(workdir, 'data', 'content.db'),
+        'IMAGE_PIPELINE_ENABLED': 'false',
+    })
+    sys.path.insert(0, BASE_DIR)
+    import app as backend
+    return backend
+
+def fill(backend, dataset):
+    """Replace every collection's records with the dataset and render index.html once"""
+    for collection, items in dataset.items():
+        existing = [('delete', item['id']) for item in backend.storage.list(collection)]
+        backend.storage.apply_batch(collection, existing + [('create', dict(item)) for item in items])
+    backend.render_worker.request(*dataset)
+
+def run_size(backend, n, repeat, rng):
+    from bs4 import BeautifulSoup
+    from html_updater import PARSERS, HTMLUpdater, parser_available
+    
+    dataset = make_dataset(n)
+    fill(backend, dataset)
+    storage = backend.storage
+    client = backend.app.test_client()
+    html_file = os.environ['HTML_FILE']
+    results = {}
+    
+    def bench(name, function):
+        results[name] = measure(function, repeat)
+        stats = results[name]
+        print(f"  {name:<44} p50 {stats['p50']:>9.3f}  p99 {stats['p99']:>9.3f} ms  peak {stats['peak_kb']:>9.1f} KB")
+    
+    reviews, faqs, gallery = storage.list('reviews'), storage.list('faqs'), storage.list('gallery')
+    review = reviews[0]
+    
+    bench('html._create_review_card', lambda: HTMLUpdater(html_file)._create_review_card(review, BeautifulSoup('', 'html.parser')))
+    card_updater = HTMLUpdater(html_file)
+    def cold_cards():
+        card_updater._card_cache.clear()
+        card_updater._markup(card_updater._review_card_html, reviews)
+    bench('html.review_cards[cold]', cold_cards)
+    bench('html.review_cards[cached]', lambda: card_updater._markup(card_updater._review_card_html, reviews))
+    content = HTMLUpdater(html_file).read_html()
+    for parser in PARSERS:
+        if parser_available(parser):
+            bench(f'html.parse[{parser}]', lambda: BeautifulSoup(content, parser))
+    for mode in ('splice', 'soup'):
+        updater = HTMLUpdater(html_file, render_mode=mode)
+        bench(f'html.update_reviews[{mode}]', lambda: updater.update_reviews(reviews))
+        bench(f'html.update_faqs[{mode}]', lambda: updater.update_faqs(faqs))
+        bench(f'html.update_gallery[{mode}]', lambda: updater.update_gallery(gallery))
+    
+    if hasattr(storage, 'content_store'):
+        def cold_load():
+            storage.content_store.invalidate()
+            storage.list('reviews')
+        bench('storage.load[cold]', cold_load)
+    bench('storage.list_json', lambda: storage.list_json('reviews'))
+    bench('storage.update', lambda: storage.update('reviews', review['id'], {'title': sentence(rng, 4)}))
+    bench('storage.insert', lambda: storage.insert('faqs', make_faq(rng)))
+    
+    bench('route GET /api/reviews', lambda: client.get('/api/reviews'))
+    bench('route GET /api/gallery?category&limit', lambda: client.get('/api/gallery?category=weddings&limit=50'))
+    bench('route GET /api/search', lambda: client.get('/api/search?q=wedding phot'))
+    bench('route POST /api/reviews', lambda: client.post('/api/reviews', json=make_review(rng)))
+    bench('route PUT /api/reviews/<id>', lambda: client.put(f"/api/reviews/{review['id']}", json={'title': sentence(rng, 4)}))
+    
+    results['index.html bytes'] = os.path.getsize(html_file)
+    return results
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold):
+    """Print p50 changes against a baseline run, returns the number of regressions"""
+    print("\n" + "=" * 60)
+    print(f"COMPARED WITH {baseline['meta'].get('commit') or 'baseline'} (p50, regression above x{threshold})")
+    print("=" * 60)
+    regressions = 0
+    for size, benchmarks in results.items():
+        for name, stats in benchmarks.items():
+            old = baseline['results'].get(size, {}).get(name)
+            if not isinstance(stats, dict) or not isinstance(old, dict) or not old['p50']:
+                continue
+            ratio = stats['p50'] / old['p50']
+            flag = ''
+            if ratio > threshold:
+                flag = '  ✗ slower'
+                regressions += 1
+            elif ratio < 1 / threshold:
+                flag = '  ✓ faster'
+            print(f"  n={size:<6} {name:<44} {old['p50']:>9.3f} -> {stats['p50']:>9.3f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the backend hot paths on synthetic data')
+    parser.add_argument('--sizes', default='10,100,1000', help='comma-separated record counts per collection')
+    parser.add_argument('--repeat', type=int, default=20, help='timed calls per benchmark')
+    parser.add_argument('--save', metavar='FILE', help='write the results as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='compare against results saved with --save')
+    parser.add_argument('--threshold', type=float, default=1.25, help='p50 ratio counted as a regression')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    
+    print("=" * 60)
+    print("BACKEND BENCHMARK")
+    print("=" * 60)
+    
+    workdir = tempfile.mkdtemp(prefix='shiv-benchmark-')
+    try:
+        backend = load_backend(workdir)
+        rng = random.Random(1)
+        results = {}
+        for n in sizes:
+            print(f"\nn = {n}")
+            results[str(n)] = run_size(backend, n, args.repeat, rng)
+        backend.render_worker.stop()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    report = {
+        'meta': {
+            'commit': current_commit(),
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'storage': backend.app_config.STORAGE_BACKEND,
+            'render_mode': backend.app_config.HTML_RENDER_MODE,
+            'repeat': args.repeat,
+            'sizes': sizes,
+        },
+        'results': results,
+    }
+    
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results saved to {args.save}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -12,12 +12,85 @@ class Config:
     
     # File paths
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    DATA_DIR = os.path.join(BASE_DIR, 'data')
-    HTML_FILE = os.path.join(BASE_DIR, '..', 'index.html')
+    DATA_DIR = os.environ.get('DATA_DIR') or os.path.join(BASE_DIR, 'data')
+    HTML_FILE = os.environ.get('HTML_FILE') or os.path.join(BASE_DIR, '..', 'index.html')
+    
+    # HTML rendering: 'splice' rewrites only the marked regions of index.html,
+    # 'soup' re-parses and re-serializes the whole document
+    HTML_RENDER_MODE = os.environ.get('HTML_RENDER_MODE', 'splice')
+    # BeautifulSoup parser of the 'soup' mode: 'auto' (fastest one that renders exactly
+    # like html.parser), 'lxml' or 'html.parser'
+    HTML_PARSER = os.environ.get('HTML_PARSER', 'auto')
+    # Rendered card fragments kept in memory, keyed by a hash of the record
+    CARD_CACHE_SIZE = int(os.environ.get('CARD_CACHE_SIZE', '2048'))
+    
+    # Minified index.html with .gz/.br siblings for static hosting, rebuilt after every render
+    BUILD_OUTPUT_ENABLED = os.environ.get('BUILD_OUTPUT_ENABLED', 'True').lower() == 'true'
+    BUILD_OUTPUT_DIR = os.environ.get('BUILD_OUTPUT_DIR') or os.path.join(os.path.dirname(HTML_FILE), 'dist')
+    BUILD_IN_BACKGROUND = os.environ.get('BUILD_IN_BACKGROUND', 'True').lower() == 'true'
+    # Replace the Tailwind CDN script in the build with a purged stylesheet. Needs the Tailwind v3
+    # CLI: a `tailwindcss` binary on PATH, or the command in TAILWIND_CLI (e.g. "npx tailwindcss@3")
+    BUILD_TAILWIND = os.environ.get('BUILD_TAILWIND', 'True').lower() == 'true'
+    TAILWIND_CLI = os.environ.get('TAILWIND_CLI')
+    # Generator mode: leave HTML_FILE untouched and render the page from SITE_TEMPLATE plus the data
+    # into BUILD_OUTPUT_DIR, re-rendering only the sections whose data changed (see site_generator.py)
+    SITE_GENERATOR_ENABLED = os.environ.get('SITE_GENERATOR_ENABLED', 'False').lower() == 'true'
+    SITE_TEMPLATE = os.environ.get('SITE_TEMPLATE') or HTML_FILE
+    
+    # Background HTML regeneration: edits arriving within the debounce window
+    # are rendered together, at most RENDER_MAX_DELAY_SECONDS after the first one
+    RENDER_IN_BACKGROUND = os.environ.get('RENDER_IN_BACKGROUND', 'True').lower() == 'true'
+    RENDER_DEBOUNCE_SECONDS = float(os.environ.get('RENDER_DEBOUNCE_SECONDS', '0.5'))
+    RENDER_MAX_DELAY_SECONDS = float(os.environ.get('RENDER_MAX_DELAY_SECONDS', '5'))
+    # Re-render when data/*.json or the page is changed outside the API (hand edits, git pull).
+    # Uses inotify if the inotify_simple package is installed, otherwise polls every FILE_WATCHER_POLL_SECONDS
+    FILE_WATCHER_ENABLED = os.environ.get('FILE_WATCHER_ENABLED', 'True').lower() == 'true'
+    FILE_WATCHER_DEBOUNCE_SECONDS = float(os.environ.get('FILE_WATCHER_DEBOUNCE_SECONDS', '0.5'))
+    FILE_WATCHER_POLL_SECONDS = float(os.environ.get('FILE_WATCHER_POLL_SECONDS', '1'))
+    
+    # Storage backend: 'json' (data/*.json) or 'sqlite'
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'json')
+    SQLITE_DATABASE = os.environ.get('SQLITE_DATABASE') or os.path.join(DATA_DIR, 'content.db')
+    
+    # Responsive gallery images (needs Pillow): local images added to the gallery
+    # are resized into these widths/formats under IMAGE_OUTPUT_DIR
+    IMAGE_PIPELINE_ENABLED = os.environ.get('IMAGE_PIPELINE_ENABLED', 'True').lower() == 'true'
+    IMAGE_OUTPUT_DIR = os.path.join(BASE_DIR, '..', 'images', 'generated')
+    IMAGE_WIDTHS = (480, 960, 1600)
+    IMAGE_FORMATS = ('avif', 'webp', 'jpeg')
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+    
+    # Largest limit= of the list endpoints, and records per admin page
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '500'))
+    ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', '60'))
+    
+    # List endpoints: gzip (and brotli, if installed) bodies of at least this many bytes
+    RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', 'True').lower() == 'true'
+    RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESS_MIN_BYTES', '512'))
+    
+    # Phase timings in Server-Timing headers and Prometheus histograms at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'False').lower() == 'true'
     
     # Git settings
     GIT_BRANCH = os.environ.get('GIT_BRANCH') or 'main'
     AUTO_PUSH = os.environ.get('AUTO_PUSH', 'False').lower() == 'true'
+    # Repository to publish from, defaults to the one containing backend/
+    GIT_REPO_PATH = os.environ.get('GIT_REPO_PATH') or None
+    # Paths (git pathspecs, relative to the repository) that publishing may commit
+    GIT_PUBLISH_PATHS = tuple(
+        path.strip() for path in (os.environ.get('GIT_PUBLISH_PATHS') or 'index.html,backend/data/*.json,images/generated').split(',')
+    )
+    # 'cli' runs git as a subprocess, 'dulwich' works in-process (needs dulwich installed)
+    GIT_BACKEND = os.environ.get('GIT_BACKEND') or 'cli'
+    # /git/status is cached this long; backend writes and publishes refresh it immediately
+    GIT_STATUS_TTL_SECONDS = float(os.environ.get('GIT_STATUS_TTL_SECONDS', '30'))
+    GIT_PUBLISH_IN_BACKGROUND = os.environ.get('GIT_PUBLISH_IN_BACKGROUND', 'True').lower() == 'true'
+    # Publishes requested within this window are squashed into one commit
+    GIT_PUBLISH_WINDOW_SECONDS = float(os.environ.get('GIT_PUBLISH_WINDOW_SECONDS', '2.0'))
+    # Publish jobs shared by every worker process (git-ignored, never published)
+    GIT_PUBLISH_JOBS_FILE = os.environ.get('GIT_PUBLISH_JOBS_FILE') or os.path.join(DATA_DIR, '.publish_jobs.json')
+    GIT_PUSH_RETRIES = int(os.environ.get('GIT_PUSH_RETRIES', '3'))
+    GIT_PUSH_BACKOFF_SECONDS = float(os.environ.get('GIT_PUSH_BACKOFF_SECONDS', '2.0'))
     
     # CORS settings
     CORS_ORIGINS = ['http://localhost:5000', 'http://127.0.0.1:5000']
@@ -46,6 +119,10 @@ class TestingConfig(Config):
     """Testing configuration"""
     DEBUG = True
     TESTING = True
+    RENDER_IN_BACKGROUND = False
+    BUILD_IN_BACKGROUND = False
+    GIT_PUBLISH_IN_BACKGROUND = False
+    FILE_WATCHER_ENABLED = False
 
 # Configuration dictionary
 config = {
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+from atomic_file import atomic_write, file_lock, is_recorded_write, record_write
+from metrics import metrics
+
+def serialize_json(data):
+    """Compact JSON body matching the output of Flask's jsonify"""
+    return (json.dumps(data, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+
+class ContentStore:
+    """In-memory cache of the JSON data files
+    
+    Each file is decoded once and kept until its stat signature (mtime, size,
+    inode) changes, so repeated reads of an unchanged collection cost a single
+    os.stat. The compact JSON body served by the list endpoints is cached too.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def _signature(self, file_path):
+        """Cheap change detector for a data file, None if it does not exist"""
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def version(self, file_path):
+        """Token that changes whenever the file is rewritten"""
+        return self._signature(file_path)
+    
+    def _entry(self, file_path):
+        """Return the cache entry for a file, decoding it again only if it changed on disk"""
+        signature = self._signature(file_path)
+        if signature is None:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry and entry['signature'] == signature:
+                return entry
+        
+        with file_lock(file_path, shared=True), metrics.timer('json_load'):
+            signature = self._signature(file_path)
+            if signature is None:
+                return None
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        entry = {'signature': signature, 'data': data, 'body': None, 'derived': {}}
+        with self._lock:
+            self._entries[file_path] = entry
+        return entry
+    
+    def get(self, file_path, default=None):
+        """Cached data of a file. Shared between callers, do not modify it"""
+        entry = self._entry(file_path)
+        if entry is None:
+            return [] if default is None else default
+        return entry['data']
+    
+    def load(self, file_path, default=None):
+        """Copy of a file's data that the caller is free to modify"""
+        data = self.get(file_path, default)
+        if isinstance(data, list):
+            return [dict(item) if isinstance(item, dict) else item for item in data]
+        if isinstance(data, dict):
+            return dict(data)
+        return data
+    
+    def get_json(self, file_path, default=None):
+        """Compact JSON body of a file's data, serialized once per change"""
+        entry = self._entry(file_path)
+        if entry is None:
+            return serialize_json([] if default is None else default)
+        
+        if entry['body'] is None:
+            with metrics.timer('json_serialize'):
+                entry['body'] = serialize_json(entry['data'])
+        return entry['body']
+    
+    def derive(self, file_path, name, build, default=None):
+        """Structure built from a file's data (e.g. an index), cached until the file changes"""
+        entry = self._entry(file_path)
+        if entry is None:
+            return build([] if default is None else default)
+        
+        if name not in entry['derived']:
+            entry['derived'][name] = build(entry['data'])
+        return entry['derived'][name]
+    
+    def save(self, file_path, data, derived=None):
+        """Atomically write data to a file and keep it as the cached copy
+        
+        derived seeds structures the caller already built for the new data,
+        so derive() does not have to rebuild them.
+        """
+        with metrics.timer('json_serialize'):
+            content = json.dumps(data, indent=2, ensure_ascii=False)
+        with file_lock(file_path), metrics.timer('json_write'):
+            atomic_write(file_path, content)
+            record_write(file_path)
+            signature = self._signature(file_path)
+        
+        entry = {
+            'signature': signature,
+            'data': data,
+            'body': None,
+            'derived': dict(derived or {})
+        }
+        with self._lock:
+            self._entries[file_path] = entry
+    
+    def saved_current(self, file_path):
+        """Whether the file on disk is the version the backend last saved, in this or another worker process"""
+        return is_recorded_write(file_path)
+    
+    def invalidate(self, file_path=None):
+        """Drop the cached copy of one file, or of every file"""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(file_path, None)
+
@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # inotify_simple is optional (Linux only), the watcher polls then
+    INotify = None
+
+class FileWatcher:
+    """Notices files changed on disk by something other than the backend
+    
+    Hand edits and `git pull` can rewrite data/*.json or index.html behind
+    the backend's back. `files` maps each watched path to a key (e.g. its
+    collection); once no change has arrived for `debounce` seconds, the keys
+    of the changed files are passed to on_change() in one call.
+    
+    Changes come from inotify when the inotify_simple package is installed,
+    otherwise from polling the files' stat signatures every `poll_interval`
+    seconds. Only the listed files are looked at, so lock files, temp files
+    and build outputs next to them never wake the watcher. `is_own_write`,
+    if given, is asked about each changed path before on_change() runs, and
+    files the backend wrote itself are skipped.
+    """
+    
+    EVENTS = ('CLOSE_WRITE', 'MOVED_TO', 'CREATE', 'DELETE', 'MOVED_FROM')
+    
+    def __init__(self, files, on_change, debounce=0.5, poll_interval=1.0, is_own_write=None, use_inotify=True):
+        self.files = {os.path.abspath(path): key for path, key in files.items()}
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.is_own_write = is_own_write
+        self.backend = 'inotify' if use_inotify and INotify else 'polling'
+        
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._inotify = None
+        self._watches = {}  # inotify watch descriptor -> directory
+        self._signatures = {}
+        
+        self._changes = 0
+        self._ignored = 0
+        self._last_change = None
+        self._last_error = None
+    
+    def start(self):
+        """Start the watcher thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._open()
+            self._thread = threading.Thread(target=self._run, name='file-watcher', daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout=None):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+    
+    def status(self):
+        with self._lock:
+            return {
+                'running': bool(self._thread and self._thread.is_alive()),
+                'backend': self.backend,
+                'files': len(self.files),
+                'changes': self._changes,
+                'ignored_own_writes': self._ignored,
+                'last_change': self._last_change,
+                'last_error': self._last_error,
+            }
+    
+    def _signature(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def _open(self):
+        """Set up inotify watches, or take the baseline signatures for polling"""
+        if self.backend == 'inotify':
+            try:
+                self._inotify = INotify()
+                mask = 0
+                for event in self.EVENTS:
+                    mask |= getattr(flags, event)
+                # Watch the directories: atomic writes replace the files, and with them a file watch
+                for directory in sorted({os.path.dirname(path) for path in self.files}):
+                    if os.path.isdir(directory):
+                        self._watches[self._inotify.add_watch(directory, mask)] = directory
+                return
+            except OSError as e:  # e.g. the inotify watch limit is reached
+                self._last_error = f'inotify unavailable, polling instead: {e}'
+                self.backend = 'polling'
+        self._signatures = {path: self._signature(path) for path in self.files}
+    
+    def _wait(self, timeout):
+        """Paths changed within `timeout` seconds"""
+        if self.backend == 'inotify':
+            changed = set()
+            for event in self._inotify.read(timeout=int(timeout * 1000)):
+                path = os.path.join(self._watches.get(event.wd, ''), event.name)
+                if path in self.files:
+                    changed.add(path)
+            return changed
+        
+        self._stopping.wait(timeout)
+        changed = set()
+        for path in self.files:
+            signature = self._signature(path)
+            if signature != self._signatures.get(path):
+                self._signatures[path] = signature
+                changed.add(path)
+        return changed
+    
+    def _run(self):
+        pending = set()
+        last_event = None
+        while not self._stopping.is_set():
+            if pending:
+                timeout = max(0.0, last_event + self.debounce - time.monotonic())
+            else:
+                timeout = self.poll_interval
+            try:
+                changed = self._wait(timeout)
+            except Exception as e:
+                with self._lock:
+                    self._last_error = str(e)
+                self._stopping.wait(self.poll_interval)
+                continue
+            
+            if changed:
+                pending.update(changed)
+                last_event = time.monotonic()
+            elif pending and time.monotonic() - last_event >= self.debounce:
+                self._dispatch(pending)
+                pending = set()
+    
+    def _dispatch(self, paths):
+        """Report a settled burst of changes, minus the backend's own writes"""
+        own = {path for path in paths if self.is_own_write and self.is_own_write(path)}
+        keys = sorted({self.files[path] for path in paths - own})
+        with self._lock:
+            self._ignored += len(own)
+            if keys:
+                self._changes += 1
+                self._last_change = {'keys': keys, 'at': datetime.now().isoformat()}
+        if not keys:
+            return
+        try:
+            self.on_change(keys)
+        except Exception as e:
+            with self._lock:
+                self._last_error = str(e)
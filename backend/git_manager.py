@@ -1,22 +1,115 @@
-import subprocess
+import fnmatch
+import itertools
 import os
+import shlex
+import subprocess
+import threading
+import time
+from datetime import datetime
+from metrics import metrics
+
+try:
+    from dulwich import porcelain
+    from dulwich.errors import NotGitRepository
+    from dulwich.repo import Repo
+except ImportError:  # dulwich is optional, git is then run as a subprocess
+    porcelain = None
+    NotGitRepository = None
+    Repo = None
+
+# What the backend changes: the generated page, the content files and resized images.
+# dist/ is left out, it holds links to the whole site's assets (see site_output.py)
+DEFAULT_PUBLISH_PATHS = ('index.html', 'backend/data/*.json', 'images/generated')
+
+def parse_status(output):
+    """Parse `git status --porcelain=v2 --branch -z` into a dict
+    
+    Each changed file is {'path', 'index', 'worktree'} with git's one-letter
+    codes ('.' for unchanged, '?' for untracked, 'U' for conflicts), plus
+    'orig_path' for renames and copies.
+    """
+    summary = {'branch': None, 'oid': None, 'upstream': None, 'ahead': 0, 'behind': 0, 'files': []}
+    entries = output.split('\0')
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if not entry:
+            continue
+        
+        if entry.startswith('# '):
+            key, _, value = entry[2:].partition(' ')
+            if key == 'branch.oid':
+                summary['oid'] = None if value == '(initial)' else value
+            elif key == 'branch.head':
+                summary['branch'] = None if value == '(detached)' else value
+            elif key == 'branch.upstream':
+                summary['upstream'] = value
+            elif key == 'branch.ab':
+                ahead, behind = value.split()
+                summary['ahead'], summary['behind'] = int(ahead), -int(behind)
+        elif entry[0] == '1':
+            fields = entry.split(' ', 8)
+            summary['files'].append({'path': fields[8], 'index': fields[1][0], 'worktree': fields[1][1]})
+        elif entry[0] == '2':
+            # Renames and copies are followed by their source path
+            fields = entry.split(' ', 9)
+            summary['files'].append({'path': fields[9], 'index': fields[1][0], 'worktree': fields[1][1], 'orig_path': entries[i]})
+            i += 1
+        elif entry[0] == 'u':
+            fields = entry.split(' ', 10)
+            summary['files'].append({'path': fields[10], 'index': 'U', 'worktree': 'U'})
+        elif entry[0] == '?':
+            summary['files'].append({'path': entry[2:], 'index': '?', 'worktree': '?'})
+    
+    files = summary['files']
+    summary['clean'] = not files
+    summary['counts'] = {
+        'staged': sum(1 for f in files if f['index'] not in '.?U'),
+        'unstaged': sum(1 for f in files if f['worktree'] not in '.?U'),
+        'untracked': sum(1 for f in files if f['index'] == '?'),
+        'conflicted': sum(1 for f in files if f['index'] == 'U'),
+    }
+    return summary
 
 class GitManager:
-    def __init__(self):
+    """Commits and pushes the files the backend generates
+    
+    Whether the directory is a repository and which remotes it has is checked
+    once and cached (see refresh()). Publishing only stages `publish_paths`,
+    never the whole tree. With backend='dulwich' (and dulwich installed) the
+    repository is opened once and every publish step runs in-process.
+    
+    status() is cached too: for `status_ttl` seconds, or until the backend
+    changes something and calls invalidate_status().
+    """
+    
+    def __init__(self, repo_path=None, publish_paths=DEFAULT_PUBLISH_PATHS, backend='cli', status_ttl=30):
         # Set the repository path to the parent directory of backend
-        self.repo_path = os.path.join(os.path.dirname(__file__), '..')
+        self.repo_path = os.path.abspath(repo_path or os.path.join(os.path.dirname(__file__), '..'))
+        self.publish_paths = tuple(publish_paths)
+        self.backend = 'dulwich' if backend == 'dulwich' and porcelain is not None else 'cli'
+        self._state = None
+        self._repo = None
+        self._lock = threading.RLock()
+        self.status_ttl = status_ttl
+        self._status = None
+        self._status_lock = threading.Lock()
+        self._invalidations = itertools.count(1)
+        self._status_generation = 0
     
     def run_git_command(self, command):
-        """Execute a git command"""
+        """Execute a git command, given as an argument list (a string is split shell-style)"""
+        args = shlex.split(command) if isinstance(command, str) else list(command)
         try:
-            result = subprocess.run(
-                command,
-                cwd=self.repo_path,
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            with metrics.timer(f'git_{args[1]}' if len(args) > 1 else 'git'):
+                result = subprocess.run(
+                    args,
+                    cwd=self.repo_path,
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
             return result.stdout
         except subprocess.CalledProcessError as e:
             error_msg = e.stderr if e.stderr else str(e)
@@ -24,39 +117,98 @@ class GitManager:
         except FileNotFoundError:
             raise Exception("Git is not installed or not in PATH. Please install Git first.")
     
+    def _repo_state(self):
+        """Cached {'is_repo', 'remotes'} of the repository"""
+        with self._lock:
+            if self._state is None:
+                if self.backend == 'dulwich':
+                    self._state = self._dulwich_state()
+                else:
+                    self._state = self._cli_state()
+            return self._state
+    
+    def _cli_state(self):
+        try:
+            self.run_git_command(['git', 'rev-parse', '--git-dir'])
+        except Exception:
+            return {'is_repo': False, 'remotes': []}
+        try:
+            remotes = self.run_git_command(['git', 'remote']).split()
+        except Exception:
+            remotes = []
+        return {'is_repo': True, 'remotes': remotes}
+    
+    def _dulwich_state(self):
+        try:
+            self._repo = Repo(self.repo_path)
+        except NotGitRepository:
+            self._repo = None
+            return {'is_repo': False, 'remotes': []}
+        remotes = [
+            section[1].decode('utf-8') for section in self._repo.get_config().keys()
+            if len(section) == 2 and section[0] == b'remote'
+        ]
+        return {'is_repo': True, 'remotes': remotes}
+    
+    def refresh(self):
+        """Forget the cached repository state, e.g. after `git init` or `git remote add`"""
+        with self._lock:
+            if self._repo is not None:
+                self._repo.close()
+            self._repo = None
+            self._state = None
+    
     def is_git_repo(self):
         """Check if current directory is a git repository"""
-        try:
-            self.run_git_command('git rev-parse --git-dir')
-            return True
-        except:
-            return False
+        return self._repo_state()['is_repo']
     
     def has_remote(self):
         """Check if repository has a remote configured"""
-        try:
-            result = self.run_git_command('git remote -v')
-            return len(result.strip()) > 0
-        except:
-            return False
+        return bool(self._repo_state()['remotes'])
     
     def get_status(self):
         """Get git status"""
         if not self.is_git_repo():
             raise Exception("Not a git repository. Run 'git init' first or use the setup_git.py script.")
-        return self.run_git_command('git status')
+        return self.run_git_command(['git', 'status'])
+    
+    def status(self):
+        """Cached structured status (branch, ahead/behind, changed files), see parse_status()"""
+        with self._status_lock:
+            cached = self._status
+            if (cached and cached['generation'] == self._status_generation
+                    and time.monotonic() - cached['read_at'] < self.status_ttl):
+                return cached['summary']
+            
+            if not self.is_git_repo():
+                raise Exception("Not a git repository. Run 'git init' first or use the setup_git.py script.")
+            generation = self._status_generation
+            summary = parse_status(self.run_git_command(['git', 'status', '--porcelain=v2', '--branch', '-z']))
+            summary['checked_at'] = datetime.now().isoformat()
+            self._status = {'summary': summary, 'generation': generation, 'read_at': time.monotonic()}
+            return summary
+    
+    def invalidate_status(self):
+        """Make the next status() call read git again"""
+        self._status_generation = next(self._invalidations)
     
     def add_all(self):
         """Stage all changes"""
         if not self.is_git_repo():
             raise Exception("Not a git repository. Please initialize git first.")
-        return self.run_git_command('git add .')
+        try:
+            return self.run_git_command(['git', 'add', '.'])
+        finally:
+            self.invalidate_status()
     
     def commit(self, message):
         """Commit changes"""
         if not self.is_git_repo():
             raise Exception("Not a git repository. Please initialize git first.")
-        return self.run_git_command(f'git commit -m "{message}"')
+        try:
+            return self.run_git_command(['git', 'commit', '-m', message])
+        finally:
+            self.invalidate_status()
     
     def push(self, branch='main'):
         """Push changes to remote"""
@@ -64,18 +216,113 @@ class GitManager:
             raise Exception("Not a git repository. Please initialize git first.")
         if not self.has_remote():
             raise Exception("No remote repository configured. Please add a remote first using 'git remote add origin <url>'")
-        return self.run_git_command(f'git push origin {branch}')
+        try:
+            if self.backend == 'dulwich':
+                return self._dulwich_push(branch)
+            return self.run_git_command(['git', 'push', 'origin', branch])
+        finally:
+            self.invalidate_status()
     
     def has_changes(self):
         """Check if there are uncommitted changes"""
         try:
-            status = self.run_git_command('git status --porcelain')
+            status = self.run_git_command(['git', 'status', '--porcelain'])
             return len(status.strip()) > 0
-        except:
+        except Exception:
             return False
     
+    def changed_paths(self):
+        """Changed files under publish_paths as (path, untracked) pairs, relative to the repository"""
+        if self.backend == 'dulwich':
+            return self._dulwich_changed_paths()
+        
+        output = self.run_git_command(
+            ['git', 'status', '--porcelain', '-z', '--untracked-files=all', '--'] + list(self.publish_paths)
+        )
+        entries = output.split('\0')
+        changed = []
+        i = 0
+        while i < len(entries):
+            entry = entries[i]
+            i += 1
+            if not entry:
+                continue
+            code, path = entry[:2], entry[3:]
+            changed.append((path, code == '??'))
+            if 'R' in code or 'C' in code:
+                # Renames and copies are followed by their source path
+                changed.append((entries[i], False))
+                i += 1
+        return changed
+    
+    def _in_publish_paths(self, path):
+        return any(
+            fnmatch.fnmatch(path, pattern) or path.startswith(pattern.rstrip('/') + '/')
+            for pattern in self.publish_paths
+        )
+    
+    def _dulwich_changed_paths(self):
+        self._repo_state()
+        status = porcelain.status(self._repo, untracked_files='all')
+        tracked = set()
+        for paths in status.staged.values():
+            tracked.update(os.fsdecode(path) for path in paths)
+        tracked.update(os.fsdecode(path) for path in status.unstaged)
+        untracked = {os.fsdecode(path) for path in status.untracked} - tracked
+        return (
+            [(path, False) for path in sorted(tracked) if self._in_publish_paths(path)]
+            + [(path, True) for path in sorted(untracked) if self._in_publish_paths(path)]
+        )
+    
+    def commit_changes(self, message):
+        """Stage and commit the changed publish_paths only. Returns the committed paths"""
+        with self._lock:
+            changed = self.changed_paths()
+            if not changed:
+                return []
+            paths = [path for path, _ in changed]
+            
+            try:
+                if self.backend == 'dulwich':
+                    self._dulwich_commit(message, paths)
+                else:
+                    # `commit --only` picks up tracked edits and deletions itself; new files need an add first
+                    if any(untracked for _, untracked in changed):
+                        self.run_git_command(['git', 'add', '-A', '--'] + paths)
+                    self.run_git_command(['git', 'commit', '-m', message, '--only', '--'] + paths)
+            finally:
+                self.invalidate_status()
+            return paths
+    
+    def publish(self, message, branch='main'):
+        """Commit the changed publish_paths, then push. Returns the committed paths"""
+        with self._lock:
+            paths = self.commit_changes(message)
+            if paths:
+                self.push(branch)
+            return paths
+    
+    def _dulwich_commit(self, message, paths):
+        present = [path for path in paths if os.path.exists(os.path.join(self.repo_path, path))]
+        removed = [path for path in paths if path not in present]
+        try:
+            if present:
+                porcelain.add(self._repo, paths=[os.path.join(self.repo_path, path) for path in present])
+            if removed:
+                porcelain.remove(self._repo, paths=[os.path.join(self.repo_path, path) for path in removed], cached=True)
+            porcelain.commit(self._repo, message=message.encode('utf-8'))
+        except Exception as e:
+            raise Exception(f"Git command failed: {e}")
+    
+    def _dulwich_push(self, branch):
+        try:
+            porcelain.push(self._repo, 'origin', [f'refs/heads/{branch}'.encode('utf-8')])
+        except Exception as e:
+            raise Exception(f"Git command failed: {e}")
+        return ''
+    
     def commit_and_push(self, message, branch='main'):
-        """Add, commit, and push changes"""
+        """Commit the changed publish paths and push them"""
         try:
             # Check if git is set up
             if not self.is_git_repo():
@@ -84,55 +331,42 @@ class GitManager:
             if not self.has_remote():
                 raise Exception("No remote repository configured. Please add a remote first.")
             
-            # Check if there are any changes first
-            if not self.has_changes():
-                return "No changes to commit. Working tree is clean."
-            
-            # Stage all changes
-            self.add_all()
-            
-            # Commit changes
             try:
-                commit_result = self.commit(message)
-            except Exception as e:
-                error_str = str(e).lower()
-                if "nothing to commit" in error_str or "working tree clean" in error_str:
-                    return "No changes to commit. Working tree is clean."
-                raise e
-            
-            # Push to remote
-            try:
-                push_result = self.push(branch)
+                paths = self.publish(message, branch)
             except Exception as e:
                 error_str = str(e).lower()
                 if "permission denied" in error_str or "publickey" in error_str:
                     raise Exception("Authentication failed. Please set up SSH keys or switch to HTTPS. See GIT_SETUP_GUIDE.md")
                 raise e
             
+            if not paths:
+                return "No changes to commit. Working tree is clean."
             return f"✓ Successfully committed and pushed: {message}"
         except Exception as e:
-            # More user-friendly error message
-            error_msg = str(e)
-            error_lower = error_msg.lower()
-            
-            if "nothing to commit" in error_lower or "working tree clean" in error_lower:
-                return "No changes to commit. Working tree is clean."
-            elif "permission denied" in error_lower or "publickey" in error_lower:
-                return "Authentication failed. Please check GIT_SETUP_GUIDE.md for SSH/HTTPS setup."
-            elif "could not resolve host" in error_lower:
-                return "Network error. Please check your internet connection."
-            
-            raise Exception(f"Git operation failed: {error_msg}")
+            friendly = self.describe_error(e)
+            if friendly:
+                return friendly
+            raise Exception(f"Git operation failed: {e}")
+    
+    def describe_error(self, error):
+        """User-friendly message for common git failures, None for anything else"""
+        error_lower = str(error).lower()
+        
+        if "nothing to commit" in error_lower or "working tree clean" in error_lower:
+            return "No changes to commit. Working tree is clean."
+        elif "permission denied" in error_lower or "publickey" in error_lower:
+            return "Authentication failed. Please check GIT_SETUP_GUIDE.md for SSH/HTTPS setup."
+        elif "could not resolve host" in error_lower:
+            return "Network error. Please check your internet connection."
+        return None
     
     def pull(self, branch='main'):
         """Pull changes from remote"""
-        return self.run_git_command(f'git pull origin {branch}')
+        try:
+            return self.run_git_command(['git', 'pull', 'origin', branch])
+        finally:
+            self.invalidate_status()
     
     def get_current_branch(self):
         """Get current branch name"""
-        return self.run_git_command('git branch --show-current').strip()
-    
-    def has_changes(self):
-        """Check if there are uncommitted changes"""
-        status = self.get_status()
-        return "nothing to commit" not in status
+        return self.run_git_command(['git', 'branch', '--show-current']).strip()
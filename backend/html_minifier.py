@@ -0,0 +1,277 @@
+import json
+import re
+from html.parser import HTMLParser
+
+# Markup tokens: comments, doctype/CDATA, raw-text elements with their content, tags, text
+TOKEN_PATTERN = re.compile(
+    r'(?P<comment><!--.*?-->)'
+    r'|(?P<declaration><![^>]*>)'
+    r'|(?P<raw><(?P<raw_name>script|style|pre|textarea)\b(?:"[^"]*"|\'[^\']*\'|[^>"\'])*>.*?</(?P=raw_name)\s*>)'
+    r'|(?P<tag></?[a-zA-Z](?:"[^"]*"|\'[^\']*\'|[^>"\'])*>)'
+    r'|(?P<text>[^<]+|<)',
+    re.DOTALL | re.IGNORECASE
+)
+TAG_NAME_PATTERN = re.compile(r'</?([a-zA-Z][\w:-]*)')
+TAG_SPACE_PATTERN = re.compile(r'("[^"]*"|\'[^\']*\')|\s+')
+WHITESPACE_PATTERN = re.compile(r'[ \t\r\n\f]+')
+
+# Whitespace next to these tags never renders, so it can be dropped entirely, unless the
+# element's class or style displays it inline. Elements that pages often lay out inline
+# (li, td, option, dd, ...) are not listed: whitespace next to them is collapsed, not dropped.
+BLOCK_TAGS = frozenset('''
+    address article aside base blockquote body br details dialog div dl fieldset figcaption figure footer
+    form h1 h2 h3 h4 h5 h6 head header hr html link main meta nav noscript ol p section
+    summary table tbody tfoot thead title tr ul script style
+'''.split())
+VOID_TAGS = frozenset('area base br col embed hr img input link meta source track wbr'.split())
+# Tailwind display utilities (with any variant prefix) and inline styles that make an element inline
+INLINE_CLASS_PATTERN = re.compile(r'(?:^|[\s:])(?:inline|inline-block|inline-flex|inline-grid|inline-table|contents)(?=\s|$)')
+INLINE_STYLE_PATTERN = re.compile(r'display\s*:\s*(?:inline|contents)')
+
+# Script types whose content is JavaScript (no type attribute means JavaScript too)
+JS_TYPES = ('', 'text/javascript', 'application/javascript', 'module')
+JSON_TYPES = ('application/json', 'application/ld+json')
+
+# Characters after which a '/' starts a regular expression literal rather than a division
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_KEYWORDS = ('return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'do', 'else')
+
+CSS_TOKEN_PATTERN = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/|\s+', re.DOTALL)
+CSS_PUNCTUATION_PATTERN = re.compile(r'\s*([{};,>])\s*')
+
+def minify_css(css):
+    """Drop comments and insignificant whitespace from a stylesheet, strings are kept verbatim"""
+    parts = []
+    position = 0
+    for match in CSS_TOKEN_PATTERN.finditer(css):
+        parts.append(css[position:match.start()])
+        if match.group(1):
+            parts.append('\0' + match.group(1) + '\0')
+        else:
+            parts.append(' ')
+        position = match.end()
+    parts.append(css[position:])
+    
+    # Squeeze whitespace around punctuation outside strings only
+    pieces = ''.join(parts).split('\0')
+    for i in range(0, len(pieces), 2):
+        pieces[i] = CSS_PUNCTUATION_PATTERN.sub(r'\1', re.sub(r' +', ' ', pieces[i])).replace(';}', '}')
+    return ''.join(pieces).strip()
+
+def _literal_end(js, start):
+    """Index just past the string or template literal starting at `start`"""
+    quote, i, length = js[start], start + 1, len(js)
+    while i < length:
+        char = js[i]
+        if char == '\\':
+            i += 2
+        elif char == quote:
+            return i + 1
+        elif quote == '`' and js.startswith('${', i):
+            # Template substitutions may hold strings and templates of their own
+            i, depth = i + 2, 1
+            while i < length and depth:
+                if js[i] in '"\'`':
+                    i = _literal_end(js, i)
+                    continue
+                depth += {'{': 1, '}': -1}.get(js[i], 0)
+                i += 1
+        else:
+            i += 1
+    return length
+
+def minify_js(js):
+    """Conservative JavaScript minification
+    
+    Removes comments and indentation and collapses whitespace runs, keeping a
+    newline wherever one was (automatic semicolon insertion depends on them).
+    Strings, template literals and regular expression literals are copied
+    verbatim. Nothing is renamed or rewritten.
+    """
+    out = []
+    i, length = 0, len(js)
+    last_code = ''  # last non-whitespace character emitted outside literals
+    last_word = ''
+    while i < length:
+        char = js[i]
+        following = js[i + 1] if i + 1 < length else ''
+        
+        if char in '"\'`':
+            end = _literal_end(js, i)
+            out.append(js[i:end])
+            i = end
+            last_code, last_word = char, ''
+        elif char == '/' and following == '/':
+            end = js.find('\n', i)
+            i = length if end == -1 else end
+        elif char == '/' and following == '*':
+            end = js.find('*/', i + 2)
+            comment = js[i:] if end == -1 else js[i:end + 2]
+            out.append('\n' if '\n' in comment else ' ')
+            i = length if end == -1 else end + 2
+        elif char == '/' and (last_code in REGEX_PRECEDERS or last_code == '' or last_word in REGEX_KEYWORDS):
+            end, in_class = i + 1, False
+            while end < length and js[end] != '\n':
+                if js[end] == '\\':
+                    end += 2
+                    continue
+                if js[end] == '[':
+                    in_class = True
+                elif js[end] == ']':
+                    in_class = False
+                elif js[end] == '/' and not in_class:
+                    break
+                end += 1
+            out.append(js[i:end + 1])
+            i = end + 1
+            last_code, last_word = '/', ''
+        elif char in ' \t\r\n\f':
+            end = i
+            while end < length and js[end] in ' \t\r\n\f':
+                end += 1
+            out.append('\n' if '\n' in js[i:end] else ' ')
+            i = end
+        else:
+            end = i + 1
+            if char.isalnum() or char in '_$':
+                while end < length and (js[end].isalnum() or js[end] in '_$'):
+                    end += 1
+                last_word = js[i:end]
+            else:
+                last_word = ''
+            out.append(js[i:end])
+            last_code = js[end - 1]
+            i = end
+    
+    # Whitespace next to a newline or at the ends is never significant
+    return re.sub(r' *\n[\n ]*', '\n', ''.join(out)).strip()
+
+def _attribute(tag, name):
+    match = re.search(rf'\s{name}\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+)', tag, re.IGNORECASE)
+    return match.group(1).strip('"\'').strip().lower() if match else ''
+
+def _inline_styled(tag):
+    """Whether a tag's class or style attribute may display it inline"""
+    return bool(INLINE_CLASS_PATTERN.search(_attribute(tag, 'class')) or INLINE_STYLE_PATTERN.search(_attribute(tag, 'style')))
+
+def _minify_raw(name, element):
+    """Minify the content of a script/style element, pre/textarea content is left alone"""
+    open_end = element.index('>') + 1
+    close_start = element.lower().rindex('</')
+    open_tag, content, close_tag = element[:open_end], element[open_end:close_start], element[close_start:]
+    open_tag = _minify_tag(open_tag)
+    
+    if name == 'style':
+        content = minify_css(content)
+    elif name == 'script' and not re.search(r'\ssrc\s*=', open_tag, re.IGNORECASE):
+        script_type = _attribute(open_tag, 'type')
+        if script_type in JS_TYPES:
+            content = minify_js(content)
+        elif script_type in JSON_TYPES:
+            try:
+                content = json.dumps(json.loads(content), ensure_ascii=False, separators=(',', ':'))
+            except ValueError:
+                pass
+    return open_tag + content + close_tag
+
+def _minify_tag(tag):
+    """Collapse whitespace between attributes, attribute values are kept verbatim"""
+    tag = TAG_SPACE_PATTERN.sub(lambda match: match.group(1) or ' ', tag)
+    return tag.replace(' >', '>').replace(' />', '/>')
+
+def minify_html(html):
+    """Minified markup: comments stripped, whitespace collapsed, inline CSS/JS minified
+    
+    Conditional comments (<!--[if ...]>) survive, as does every byte of
+    pre/textarea content and every attribute value. Whitespace between text
+    and inline elements is collapsed to one character rather than removed, so
+    the rendered page does not change.
+    """
+    tokens = []  # (kind, text, whether it is a block-level tag)
+    open_tags = []  # (name, block) of the elements open at this point
+    for match in TOKEN_PATTERN.finditer(html):
+        kind = match.lastgroup if match.lastgroup != 'raw_name' else 'raw'
+        text = match.group(kind)
+        if kind == 'comment':
+            if text.startswith('<!--[if') or text.startswith('<!--<!'):
+                tokens.append(('declaration', text, None))
+            continue
+        if kind == 'raw':
+            name = match.group('raw_name').lower()
+            tokens.append(('raw', _minify_raw(name, text), name in BLOCK_TAGS))
+        elif kind == 'tag':
+            name = TAG_NAME_PATTERN.match(text).group(1).lower()
+            if text.startswith('</'):
+                # A closing tag is as block-level as the element it closes
+                block = False
+                for depth in range(len(open_tags) - 1, -1, -1):
+                    if open_tags[depth][0] == name:
+                        block = open_tags[depth][1]
+                        del open_tags[depth:]
+                        break
+            else:
+                block = name in BLOCK_TAGS and not _inline_styled(text)
+                if name not in VOID_TAGS and not text.endswith('/>'):
+                    open_tags.append((name, block))
+            tokens.append(('tag', _minify_tag(text), block))
+        elif kind == 'text':
+            if tokens and tokens[-1][0] == 'text':
+                text = tokens.pop()[1] + text
+            tokens.append(('text', text, False))
+        else:
+            tokens.append((kind, text, False))
+    
+    out = []
+    for index, (kind, text, block) in enumerate(tokens):
+        if kind != 'text':
+            out.append(text)
+            continue
+        text = WHITESPACE_PATTERN.sub(lambda match: '\n' if '\n' in match.group() else ' ', text)
+        if text.strip():
+            out.append(text)
+            continue
+        # Whitespace-only text next to a block-level tag (or the document's ends) is dropped
+        previous = tokens[index - 1] if index else None
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if (previous is None or following is None or previous[0] == 'declaration'
+                or previous[2] or following[2]):
+            continue
+        out.append(text)
+    return ''.join(out)
+
+class _StructureParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.events = []
+    
+    def handle_starttag(self, tag, attrs):
+        self.events.append(('start', tag, tuple(attrs)))
+    
+    def handle_endtag(self, tag):
+        self.events.append(('end', tag))
+    
+    def handle_data(self, data):
+        data = ' '.join(data.split())
+        if data:
+            self.events.append(('text', data))
+
+def structure(html):
+    """Tags, attributes and whitespace-normalized text of a document, in order"""
+    parser = _StructureParser()
+    parser.feed(html)
+    parser.close()
+    return parser.events
+
+def same_structure(original, minified):
+    """Whether minification kept every element, attribute and word outside scripts and styles"""
+    def visible(events):
+        result, skip = [], 0
+        for event in events:
+            if event[0] == 'start' and event[1] in ('script', 'style'):
+                skip += 1
+            elif event[0] == 'end' and event[1] in ('script', 'style'):
+                skip -= 1
+            if event[0] != 'text' or not skip:
+                result.append(event)
+        return result
+    return visible(structure(original)) == visible(structure(minified))
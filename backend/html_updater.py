@@ -1,183 +1,519 @@
+import hashlib
+import json
 import os
-from bs4 import BeautifulSoup
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from bs4 import BeautifulSoup, Comment, FeatureNotFound
+from jinja2 import Environment, FileSystemLoader
+from atomic_file import atomic_write, file_lock, is_recorded_write, record_write
+from metrics import metrics
+
+# Stable markers around the parts of index.html the backend rewrites:
+#   <!-- region:reviews --> ...cards... <!-- /region:reviews -->
+REGION_PATTERN = re.compile(r'<!--\s*(/?)region:([\w-]+)\s*-->')
+
+# 'splice' replaces only the text between region markers,
+# 'soup' parses and re-serializes the whole document with BeautifulSoup
+RENDER_MODES = ('splice', 'soup')
+
+# Column widths of #gallery-grid (columns-2 md:columns-3 lg:columns-4)
+GALLERY_SIZES = '(min-width: 1024px) 25vw, (min-width: 768px) 33vw, 50vw'
+GALLERY_MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+# FAQs shown before the "load more" button, the rest go to the collapsed list
+VISIBLE_FAQS = 4
+
+# Card markup lives in autoescaped Jinja templates, compiled once per process
+CARD_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'cards')
+card_templates = Environment(loader=FileSystemLoader(CARD_TEMPLATE_DIR), autoescape=True, auto_reload=False)
+
+# BeautifulSoup parsers for the 'soup' render mode, fastest first (see benchmark.py).
+# 'auto' takes the first one that is installed and renders exactly like html.parser.
+PARSERS = ('lxml', 'html.parser')
+REFERENCE_PARSER = 'html.parser'
+
+# Records rendered with both parsers to check that they produce the same document
+SAMPLE_SECTIONS = {
+    'reviews': [
+        {'name': 'Asha & Ravi', 'initial': 'A', 'rating': 5, 'time': '2 months ago',
+         'title': 'Stunning <em>work</em>', 'content': 'Candid shots, \u2018perfect\u2019 timing.', 'badge': 'Local Guide'},
+        {'name': 'Meera', 'initial': 'M', 'rating': 4, 'title': 'Lovely', 'content': 'Great team'},
+        {'name': 'Karthik', 'initial': 'K', 'rating': 5, 'title': 'Recommended', 'content': 'On time'},
+        {'name': 'Divya', 'initial': 'D', 'rating': 3, 'title': 'Good', 'content': 'Nice album<br>overall'},
+    ],
+    'faqs': [{'question': 'Do you travel?', 'answer': 'Yes &amp; we <strong>love</strong> it.'}],
+    'gallery': [
+        {'url': 'images/a.jpg', 'category': 'weddings', 'alt': 'Couple'},
+        {'url': 'images/b.jpg', 'category': 'events', 'alt': 'Stage', 'derivatives': {
+            'width': 1600, 'height': 1067, 'dominant_color': '#8a7b6c', 'placeholder': 'data:image/webp;base64,AAAA',
+            'sources': {fmt: [{'url': f'images/generated/b-{w}.{fmt}', 'width': w} for w in (480, 1600)]
+                        for fmt in ('avif', 'webp', 'jpeg')}
+        }},
+    ],
+    'reels': [{'embed_url': 'https://www.instagram.com/reel/C000000001/embed'}],
+}
+
+def parser_available(parser):
+    try:
+        BeautifulSoup('', parser)
+        return True
+    except FeatureNotFound:
+        return False
+
+def index_regions(content):
+    """Map each region name to the (start, end) offsets of its inner content"""
+    regions = {}
+    open_regions = {}
+    for match in REGION_PATTERN.finditer(content):
+        closing, name = match.group(1), match.group(2)
+        if not closing:
+            open_regions[name] = match.end()
+        elif name in open_regions:
+            regions[name] = (open_regions.pop(name), match.start())
+    return regions
 
 class HTMLUpdater:
-    def __init__(self):
-        self.html_file = os.path.join(os.path.dirname(__file__), '..', 'index.html')
+    def __init__(self, html_file=None, render_mode='splice', parser='auto', card_cache_size=2048):
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode '{render_mode}'. Use one of: {', '.join(RENDER_MODES)}")
+        if parser != 'auto' and parser not in PARSERS:
+            raise ValueError(f"Unknown HTML parser '{parser}'. Use 'auto' or one of: {', '.join(PARSERS)}")
+        self.html_file = html_file or os.path.join(os.path.dirname(__file__), '..', 'index.html')
+        self.render_mode = render_mode
+        self.requested_parser = parser
+        self.parser = None  # chosen on the first soup render
+        self.parser_note = None
+        self._local = threading.local()
+        self._region_cache = None
+        self._region_cache_lock = threading.Lock()
+        self.card_cache_size = card_cache_size
+        self._card_cache = OrderedDict()
+        self._card_cache_lock = threading.Lock()
+        self.card_cache_hits = 0
+        self.card_cache_misses = 0
     
     def read_html(self):
         """Read the HTML file"""
-        with open(self.html_file, 'r', encoding='utf-8') as f:
-            return f.read()
+        with file_lock(self.html_file, shared=True), metrics.timer('html_read'):
+            with open(self.html_file, 'r', encoding='utf-8', newline='') as f:
+                return f.read()
     
     def write_html(self, content):
-        """Write to the HTML file"""
-        with open(self.html_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        """Atomically replace the HTML file"""
+        with file_lock(self.html_file), metrics.timer('html_write'):
+            atomic_write(self.html_file, content)
+            record_write(self.html_file)
     
-    def update_reviews(self, reviews):
-        """Update reviews section in HTML"""
-        html_content = self.read_html()
-        soup = BeautifulSoup(html_content, 'html.parser')
+    def wrote_current(self):
+        """Whether the HTML file on disk is the version the backend last wrote, in this or another worker process"""
+        return is_recorded_write(self.html_file)
+    
+    def _file_signature(self):
+        """Cheap change detector for the HTML file"""
+        stat = os.stat(self.html_file)
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _load_regions(self):
+        """Return the document and its region index, reusing the cached index while the file is unchanged"""
+        signature = self._file_signature()
+        with self._region_cache_lock:
+            if self._region_cache and self._region_cache[0] == signature:
+                return self._region_cache[1], dict(self._region_cache[2])
         
-        # Find the reviews container
-        review_section = soup.find('section', class_='py-20 bg-gradient-to-b from-gray-50 to-white')
-        if not review_section:
-            return
+        content = self.read_html()
+        with metrics.timer('html_locate'):
+            regions = index_regions(content)
+        with self._region_cache_lock:
+            self._region_cache = (signature, content, regions)
+        return content, dict(regions)
+    
+    def _store_regions(self, content, regions):
+        """Remember the index of a document we just wrote"""
+        with self._region_cache_lock:
+            self._region_cache = (self._file_signature(), content, dict(regions))
+    
+    @contextmanager
+    def batch(self):
+        """Load the HTML once, apply every section update made inside the block, write once
+        
+        Usage:
+            with html_updater.batch():
+                html_updater.update_reviews(reviews)
+                html_updater.update_faqs(faqs)
         
-        # Find the grid container for reviews
-        grid_container = review_section.find('div', class_='grid grid-cols-1 md:grid-cols-3 gap-8')
-        if not grid_container:
+        Nested batches join the outermost one. Nothing is written if no section
+        changed or if the block raises. The file stays locked for the whole
+        batch so concurrent workers cannot lose each other's updates.
+        """
+        if getattr(self._local, 'batch', None) is not None:
+            yield self
             return
         
-        # Clear existing reviews
-        grid_container.clear()
+        with file_lock(self.html_file):
+            if self.render_mode == 'splice':
+                content, regions = self._load_regions()
+                self._local.batch = {'content': content, 'regions': regions, 'dirty': False, 'missing': set()}
+            else:
+                content = self.read_html()
+                if self.parser is None:
+                    self.parser = self._choose_parser(content)
+                with metrics.timer('html_parse'):
+                    soup = BeautifulSoup(content, self.parser)
+                self._local.batch = {'soup': soup, 'dirty': False, 'missing': set()}
+            try:
+                yield self
+                state = self._local.batch
+                if state['dirty']:
+                    if 'content' in state:
+                        self.write_html(state['content'])
+                        self._store_regions(state['content'], state['regions'])
+                    else:
+                        with metrics.timer('html_serialize'):
+                            content = str(state['soup'])
+                        self.write_html(content)
+            finally:
+                self._local.batch = None
+    
+    def _choose_parser(self, content):
+        """First candidate parser that is installed and renders this document like html.parser"""
+        candidates = PARSERS if self.requested_parser == 'auto' else (self.requested_parser,)
+        notes = []
+        for parser in candidates:
+            if parser == REFERENCE_PARSER:
+                break
+            if not parser_available(parser):
+                notes.append(f'{parser} is not installed')
+                continue
+            difference = self._compare_parsers(content, parser)
+            if difference is None:
+                self.parser_note = None
+                return parser
+            notes.append(f'{parser} {difference}')
+        self.parser_note = '; '.join(notes) or None
+        return REFERENCE_PARSER
+    
+    def _compare_parsers(self, content, parser):
+        """None if rendering SAMPLE_SECTIONS with `parser` gives the same document as html.parser, else how it differs"""
+        outputs = []
+        for candidate in (REFERENCE_PARSER, parser):
+            soup = BeautifulSoup(content, candidate)
+            self._update_reviews(soup, SAMPLE_SECTIONS['reviews'])
+            self._update_faqs(soup, SAMPLE_SECTIONS['faqs'])
+            self._update_gallery(soup, SAMPLE_SECTIONS['gallery'])
+            self._update_reels(soup, SAMPLE_SECTIONS['reels'])
+            outputs.append(str(soup))
+        
+        expected, actual = outputs
+        if expected == actual:
+            return None
+        position = next((i for i, (a, b) in enumerate(zip(expected, actual)) if a != b), min(len(expected), len(actual)))
+        line = expected.count('\n', 0, position) + 1
+        return f'output differs from {REFERENCE_PARSER} at line {line}'
+    
+    def _parse_fragment(self, markup, soup):
+        """Parse a card's markup with the same parser as the document it goes into"""
+        parser = soup.builder.NAME if soup.builder else REFERENCE_PARSER
+        fragment = BeautifulSoup(markup, parser)
+        if parser == REFERENCE_PARSER or fragment.body is None:
+            return fragment
+        
+        # Document parsers like lxml wrap fragments in <html><body>
+        elements = BeautifulSoup('', REFERENCE_PARSER)
+        elements.extend(list(fragment.body.contents))
+        return elements
+    
+    def _splicing(self):
+        """Whether the active batch edits region text instead of a soup"""
+        return 'content' in self._local.batch
+    
+    def _current_soup(self):
+        """Soup of the active batch"""
+        return self._local.batch['soup']
+    
+    def _mark_dirty(self):
+        """Flag the active batch for writing"""
+        self._local.batch['dirty'] = True
+    
+    def _mark_missing(self, name):
+        """Note a section the active batch could not find in the document"""
+        self._local.batch['missing'].add(name)
+    
+    def _splice_region(self, name, markup):
+        """Replace the inner content of a region, leaving the rest of the document untouched
+        
+        Returns False, and reports the region as missing, if the document has no such region.
+        """
+        state = self._local.batch
+        region = state['regions'].get(name)
+        if region is None:
+            self._mark_missing(name)
+            return False
+        
+        start, end = region
+        content = state['content']
+        with metrics.timer('html_serialize'):
+            state['content'] = content[:start] + markup + content[end:]
+        
+        # Shift the offsets of every region after the spliced one
+        delta = len(markup) - (end - start)
+        for other, (other_start, other_end) in state['regions'].items():
+            if other_start >= end:
+                state['regions'][other] = (other_start + delta, other_end + delta)
+        state['regions'][name] = (start, start + len(markup))
+        
+        self._mark_dirty()
+        return True
+    
+    def _replace_children(self, container, elements):
+        """Swap the children of a soup container, keeping its region markers in place"""
+        markers = [
+            child for child in container.children
+            if isinstance(child, Comment) and REGION_PATTERN.fullmatch(f'<!--{child}-->')
+        ]
+        container.clear()
+        if len(markers) == 2:
+            container.append(markers[0])
+        for element in elements:
+            container.append(element)
+        if len(markers) == 2:
+            container.append(markers[1])
+    
+    def _markup(self, render, items):
+        """Concatenated markup of one section's cards"""
+        with metrics.timer('html_build'):
+            return ''.join(render(item) for item in items)
+    
+    def _elements(self, render, items, soup):
+        """Parsed card elements of one section, from a single parse of the joined markup"""
+        markup = self._markup(render, items)
+        with metrics.timer('html_build'):
+            return list(self._parse_fragment(markup, soup).contents)
+    
+    def _render_card(self, template, context):
+        """Render a card template, reusing the fragment of an identical earlier record"""
+        digest = hashlib.sha1(json.dumps(context, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        key = (template, digest)
+        with self._card_cache_lock:
+            markup = self._card_cache.get(key)
+            if markup is not None:
+                self._card_cache.move_to_end(key)
+                self.card_cache_hits += 1
+                return markup
+            self.card_cache_misses += 1
+        
+        markup = '\n' + card_templates.get_template(template).render(**context) + '\n        '
+        with self._card_cache_lock:
+            self._card_cache[key] = markup
+            while len(self._card_cache) > self.card_cache_size:
+                self._card_cache.popitem(last=False)
+        return markup
+    
+    def card_cache_status(self):
+        """Size and hit counts of the card fragment cache"""
+        with self._card_cache_lock:
+            return {
+                'size': len(self._card_cache),
+                'limit': self.card_cache_size,
+                'hits': self.card_cache_hits,
+                'misses': self.card_cache_misses
+            }
+    
+    def update_sections(self, reviews=None, faqs=None, gallery=None, reels=None):
+        """Update several sections with a single read and a single write
         
-        # Add new reviews (max 3 for the main section)
-        for review in reviews[:3]:
-            review_card = self._create_review_card(review, soup)
-            grid_container.append(review_card)
+        Sections passed as None are left untouched. Returns the regions of
+        the batch that were not found in the document, and so not rendered.
+        """
+        with self.batch():
+            if reviews is not None:
+                self.update_reviews(reviews)
+            if faqs is not None:
+                self.update_faqs(faqs)
+            if gallery is not None:
+                self.update_gallery(gallery)
+            if reels is not None:
+                self.update_reels(reels)
+            return {'missing_regions': sorted(self._local.batch['missing'])}
+    
+    def update_reviews(self, reviews):
+        """Update reviews section in HTML"""
+        with self.batch():
+            if self._splicing():
+                # Main section shows max 3 reviews, the rest go to "More Customer Reviews" if marked
+                self._splice_region('reviews', self._markup(self._review_card_html, reviews[:3]))
+                if len(reviews) > 3:
+                    self._splice_region('more-reviews', self._markup(self._small_review_card_html, reviews[3:]))
+            elif self._update_reviews(self._current_soup(), reviews):
+                self._mark_dirty()
+            else:
+                self._mark_missing('reviews')
+    
+    def _update_reviews(self, soup, reviews):
+        with metrics.timer('html_locate'):
+            # Find the reviews container
+            review_section = soup.find('section', class_='py-20 bg-gradient-to-b from-gray-50 to-white')
+            if not review_section:
+                return
+            
+            # Find the grid container for reviews
+            grid_container = review_section.find('div', class_='grid grid-cols-1 md:grid-cols-3 gap-8')
+            if not grid_container:
+                return
+        
+        # Replace existing reviews (max 3 for the main section)
+        self._replace_children(grid_container, self._elements(self._review_card_html, reviews[:3], soup))
         
         # Update the "More Customer Reviews" section if it exists
-        more_reviews_section = soup.find('div', class_='grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6')
+        with metrics.timer('html_locate'):
+            more_reviews_section = soup.find('div', class_='grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6')
         if more_reviews_section and len(reviews) > 3:
-            more_reviews_section.clear()
-            for review in reviews[3:]:
-                review_card = self._create_small_review_card(review, soup)
-                more_reviews_section.append(review_card)
+            self._replace_children(
+                more_reviews_section,
+                self._elements(self._small_review_card_html, reviews[3:], soup)
+            )
         
-        self.write_html(str(soup))
+        return True
     
     def _create_review_card(self, review, soup):
         """Create a review card element"""
-        card_html = f'''
-        <div class="bg-white rounded-2xl shadow-lg overflow-hidden transition-all duration-300 hover:shadow-xl hover:-translate-y-1 border border-gray-100">
-          <div class="p-8">
-            <div class="flex justify-between items-start mb-6">
-              <div class="flex items-center space-x-4">
-                <div class="w-14 h-14 rounded-full bg-gradient-to-br from-blue-500 to-purple-600 flex items-center justify-center text-white text-xl font-bold shadow-lg">
-                  {review.get('initial', 'A')}
-                </div>
-                <div>
-                  <h3 class="font-bold text-lg text-gray-900">{review.get('name', 'Anonymous')}</h3>
-                  <p class="text-sm text-gray-500">{review.get('time', '3 months ago')}</p>
-                </div>
-              </div>
-              <img src="https://upload.wikimedia.org/wikipedia/commons/2/2f/Google_2015_logo.svg" alt="Google" class="h-6">
-            </div>
-            <div class="flex mb-4">
-              {''.join(['<span class="text-yellow-400 text-xl">★</span>' for _ in range(review.get('rating', 5))])}
-            </div>
-            <h4 class="font-bold text-lg mb-3 text-gray-900">"{review.get('title', '')}"</h4>
-            <p class="text-gray-600 leading-relaxed mb-4">{review.get('content', '')}</p>
-            {f'<span class="inline-block bg-green-100 text-green-700 px-4 py-2 rounded-full text-sm font-semibold"><span class="mr-2">✓</span>{review.get("badge", "")}</span>' if review.get('badge') else ''}
-          </div>
-        </div>
-        '''
-        return BeautifulSoup(card_html, 'html.parser')
+        return self._parse_fragment(self._review_card_html(review), soup)
+    
+    def _review_card_html(self, review):
+        """Markup for a review card"""
+        return self._render_card('review_card.html', {'review': review})
     
     def _create_small_review_card(self, review, soup):
         """Create a small review card for the more reviews section"""
-        card_html = f'''
-        <div class="bg-white rounded-xl shadow-md overflow-hidden transition-all duration-300 hover:shadow-lg hover:-translate-y-1 border border-gray-100">
-          <div class="p-6">
-            <div class="flex items-center space-x-3 mb-4">
-              <div class="w-12 h-12 rounded-full bg-gradient-to-br from-purple-500 to-pink-600 flex items-center justify-center text-white font-bold shadow">
-                {review.get('initial', 'V')}
-              </div>
-              <div class="flex-1">
-                <h4 class="font-bold text-gray-900">{review.get('name', 'Anonymous')}</h4>
-                <div class="flex items-center space-x-2">
-                  <div class="flex">
-                    {''.join(['<span class="text-yellow-400 text-sm">★</span>' for _ in range(review.get('rating', 5))])}
-                  </div>
-                  <span class="text-xs text-gray-500">{review.get('time', '4 months ago')}</span>
-                </div>
-              </div>
-              <img src="https://upload.wikimedia.org/wikipedia/commons/2/2f/Google_2015_logo.svg" alt="Google" class="h-4">
-            </div>
-            <p class="text-gray-600 text-sm leading-relaxed">"{review.get('content', '')}"</p>
-          </div>
-        </div>
-        '''
-        return BeautifulSoup(card_html, 'html.parser')
+        return self._parse_fragment(self._small_review_card_html(review), soup)
+    
+    def _small_review_card_html(self, review):
+        """Markup for a small review card"""
+        return self._render_card('small_review_card.html', {'review': review})
     
     def update_faqs(self, faqs):
         """Update FAQs section in HTML"""
-        html_content = self.read_html()
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Find FAQ section - looking for the "Why Shiv's?" section
-        faq_section = soup.find('section', class_='bg-white')
-        if not faq_section:
-            return
-        
-        # Find the container with FAQ items
-        faq_container = faq_section.find('div', class_='space-y-4')
-        if not faq_container:
-            return
-        
-        # Clear existing FAQs
-        faq_container.clear()
+        with self.batch():
+            if self._splicing():
+                self._splice_region('faqs', self._markup(self._faq_item_html, faqs[:VISIBLE_FAQS]))
+                self._splice_region('more-faqs', self._markup(self._faq_item_html, faqs[VISIBLE_FAQS:]))
+            elif self._update_faqs(self._current_soup(), faqs):
+                self._mark_dirty()
+            else:
+                self._mark_missing('faqs')
+    
+    def _update_faqs(self, soup, faqs):
+        with metrics.timer('html_locate'):
+            faq_section = soup.find('section', id='faq')
+            if not faq_section:
+                return
+            
+            # The always visible list, and the collapsed one behind "load more"
+            faq_container = faq_section.find(
+                lambda tag: tag.name == 'div' and 'space-y-4' in tag.get('class', []) and tag.get('id') != 'more-faq'
+            )
+            more_faq_container = faq_section.find('div', id='more-faq')
+            if not faq_container:
+                return
         
-        # Add new FAQs
-        for faq in faqs:
-            faq_item = self._create_faq_item(faq, soup)
-            faq_container.append(faq_item)
+        # Replace existing FAQs
+        self._replace_children(faq_container, self._elements(self._faq_item_html, faqs[:VISIBLE_FAQS], soup))
+        if more_faq_container:
+            self._replace_children(more_faq_container, self._elements(self._faq_item_html, faqs[VISIBLE_FAQS:], soup))
         
-        self.write_html(str(soup))
+        return True
     
     def _create_faq_item(self, faq, soup):
         """Create an FAQ item element"""
-        faq_html = f'''
-        <div class="border-b border-gray-200 pb-4">
-          <button class="flex justify-between items-center w-full text-left py-4 focus:outline-none faq-question">
-            <h3 class="text-xl font-semibold text-gray-900">{faq.get('question', '')}</h3>
-            <svg class="w-6 h-6 transform transition-transform duration-200 faq-icon" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-              <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 4v16m8-8H4"></path>
-            </svg>
-          </button>
-          <div class="faq-answer hidden mt-2">
-            <p class="text-gray-600 leading-relaxed">{faq.get('answer', '')}</p>
-          </div>
-        </div>
-        '''
-        return BeautifulSoup(faq_html, 'html.parser')
+        return self._parse_fragment(self._faq_item_html(faq), soup)
+    
+    def _faq_item_html(self, faq):
+        """Markup for an FAQ item"""
+        return self._render_card('faq_item.html', {'faq': faq})
     
     def update_gallery(self, gallery_images):
         """Update gallery section in HTML"""
-        html_content = self.read_html()
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
+        with self.batch():
+            if self._splicing():
+                self._splice_region('gallery', self._markup(self._gallery_item_html, gallery_images))
+            elif self._update_gallery(self._current_soup(), gallery_images):
+                self._mark_dirty()
+            else:
+                self._mark_missing('gallery')
+    
+    def _update_gallery(self, soup, gallery_images):
         # Find gallery grid
-        gallery_grid = soup.find('div', id='gallery-grid')
+        with metrics.timer('html_locate'):
+            gallery_grid = soup.find('div', id='gallery-grid')
         if not gallery_grid:
             return
         
-        # Clear existing images
-        gallery_grid.clear()
+        # Replace existing images
+        self._replace_children(gallery_grid, self._elements(self._gallery_item_html, gallery_images, soup))
         
-        # Add new images
-        for image in gallery_images:
-            img_item = self._create_gallery_item(image, soup)
-            gallery_grid.append(img_item)
-        
-        self.write_html(str(soup))
+        return True
     
     def _create_gallery_item(self, image, soup):
         """Create a gallery image item"""
-        img_html = f'''
-        <div class="break-inside-avoid overflow-hidden shadow-md" data-category="{image.get('category', 'weddings')}">
-            <img src="{image.get('url', '')}" alt="{image.get('alt', 'Gallery image')}" class="w-full h-auto transition-transform duration-300 ease-in-out hover:scale-105">
-        </div>
-        '''
-        return BeautifulSoup(img_html, 'html.parser')
+        return self._parse_fragment(self._gallery_item_html(image), soup)
+    
+    def _gallery_item_html(self, image):
+        """Markup for a gallery image item"""
+        return self._render_card('gallery_item.html', self._gallery_context(image))
+    
+    def _gallery_context(self, image):
+        """Template values of a gallery image item"""
+        derivatives = image.get('derivatives') or {}
+        context = {
+            'category': image.get('category', 'weddings'),
+            'alt': image.get('alt', 'Gallery image'),
+            'url': image.get('url', ''),
+            'width': None,
+            'height': None,
+            'box_style': '',
+            'sources': [],
+            'fallback': None,
+            'sizes': GALLERY_SIZES
+        }
+        
+        # Reserve the image's box and paint its placeholder while the real image loads
+        if derivatives.get('width') and derivatives.get('height'):
+            context['width'] = derivatives['width']
+            context['height'] = derivatives['height']
+            box_style = f"aspect-ratio: {derivatives['width']} / {derivatives['height']};"
+            if derivatives.get('dominant_color'):
+                box_style += f" background-color: {derivatives['dominant_color']};"
+            if derivatives.get('placeholder'):
+                box_style += f" background-image: url({derivatives['placeholder']}); background-size: cover;"
+            context['box_style'] = box_style
+        
+        sources = derivatives.get('sources')
+        if not sources:
+            return context
+        
+        # Responsive variant: modern formats as <source>s, largest JPEG as the fallback src
+        srcsets = {fmt: ', '.join(f"{entry['url']} {entry['width']}w" for entry in entries) for fmt, entries in sources.items()}
+        fallback_format = 'jpeg' if 'jpeg' in sources else next(iter(sources))
+        context['fallback'] = sources[fallback_format][-1]['url']
+        context['fallback_srcset'] = srcsets[fallback_format]
+        context['sources'] = [
+            {'type': GALLERY_MIME_TYPES[fmt], 'srcset': srcsets[fmt]}
+            for fmt in ('avif', 'webp') if fmt in sources and fmt != fallback_format
+        ]
+        return context
     
     def update_reels(self, reels):
         """Update reels/Instagram section in HTML"""
-        html_content = self.read_html()
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
+        with self.batch():
+            if self._splicing():
+                self._splice_region('reels', self._markup(self._reel_embed_html, reels))
+            elif self._update_reels(self._current_soup(), reels):
+                self._mark_dirty()
+            else:
+                self._mark_missing('reels')
+    
+    def _update_reels(self, soup, reels):
         # Find the Instagram embed section
         # Looking for section with embedded Instagram posts
         instagram_section = soup.find('section', id='instagram-posts')
@@ -190,15 +526,11 @@ class HTMLUpdater:
         # This depends on how Instagram embeds are structured in your HTML
         # For now, we'll create a simple embed container
         # You may need to adjust this based on your actual HTML structure
-        
-        self.write_html(str(soup))
     
     def _create_reel_embed(self, reel, soup):
         """Create an Instagram reel embed"""
-        embed_html = f'''
-        <div class="instagram-embed">
-            <blockquote class="instagram-media" data-instgrm-permalink="{reel.get('embed_url', '')}" data-instgrm-version="14">
-            </blockquote>
-        </div>
-        '''
-        return BeautifulSoup(embed_html, 'html.parser')
+        return self._parse_fragment(self._reel_embed_html(reel), soup)
+    
+    def _reel_embed_html(self, reel):
+        """Markup for an Instagram reel embed"""
+        return self._render_card('reel_embed.html', {'reel': reel})
@@ -0,0 +1,83 @@
+import gzip
+import hashlib
+import threading
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, responses are then gzip-compressed only
+    brotli = None
+
+class ResponseCache:
+    """Conditional and compressed responses for cached bodies
+    
+    Storage hands out the same bytes object for a collection until it
+    changes, so a body's identity stands for its generation. For each new
+    body the ETag (a content hash) is computed once, and every compressed
+    variant at most once, no matter how many requests ask for it.
+    """
+    
+    def __init__(self, compress=True, min_size=512, gzip_level=6, brotli_quality=5):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        if compress:
+            self.encodings = ('br', 'gzip') if brotli else ('gzip',)
+        else:
+            self.encodings = ()
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def _entry(self, key, body):
+        if key is None:
+            return {'body': body, 'etag': hashlib.sha256(body).hexdigest()[:32], 'encoded': {}}
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['body'] is body:
+                return entry
+        
+        entry = {'body': body, 'etag': hashlib.sha256(body).hexdigest()[:32], 'encoded': {}}
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+    
+    def _encoded(self, entry, encoding):
+        """Compressed body, computed on first use"""
+        if encoding not in entry['encoded']:
+            if encoding == 'br':
+                data = brotli.compress(entry['body'], quality=self.brotli_quality)
+            else:
+                data = gzip.compress(entry['body'], compresslevel=self.gzip_level, mtime=0)
+            entry['encoded'][encoding] = data
+        return entry['encoded'][encoding]
+    
+    def negotiate(self, accept_encodings):
+        """Best supported encoding for an Accept-Encoding header, None for identity"""
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accept_encodings.quality(encoding)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+    
+    def response(self, key, body, mimetype='application/json'):
+        """Response for the current request: 304 if the client's copy is current, else the (compressed) body
+        
+        key=None is for one-off bodies (e.g. a filtered list): they get an
+        ETag and compression too, but nothing is kept for later requests.
+        """
+        entry = self._entry(key, body)
+        encoding = self.negotiate(request.accept_encodings) if len(body) >= self.min_size else None
+        # Strong ETags must differ between encodings of the same content
+        etag = f"{entry['etag']}-{encoding}" if encoding else entry['etag']
+        
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(self._encoded(entry, encoding) if encoding else body, mimetype=mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,213 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote, urlparse
+
+from atomic_file import atomic_write
+
+try:
+    from PIL import Image, ImageFilter, features
+except ImportError:  # Pillow is optional, gallery images are then served as uploaded
+    Image = None
+    ImageFilter = None
+    features = None
+
+# Width of the blurred low-quality placeholder inlined as a data URI
+PLACEHOLDER_WIDTH = 16
+
+# Output format -> (Pillow format name, save options)
+FORMATS = {
+    'avif': ('AVIF', {'quality': 50}),
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+def file_hash(path):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _supported(fmt):
+    if fmt == 'jpeg':
+        return True
+    return bool(features and features.check(fmt))
+
+def image_metadata(image):
+    """Layout and placeholder data for an opened image
+    
+    Returns the intrinsic size, aspect ratio, dominant color (most common of a
+    5-color quantization) and a tiny blurred LQIP as a data URI.
+    """
+    width, height = image.size
+    rgb = image.convert('RGBA')
+    background = Image.new('RGBA', rgb.size, (255, 255, 255, 255))
+    rgb = Image.alpha_composite(background, rgb).convert('RGB')
+    
+    sample = rgb.copy()
+    sample.thumbnail((64, 64))
+    quantized = sample.quantize(colors=5)
+    palette = quantized.getpalette()
+    _, index = max(quantized.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+    
+    placeholder_height = max(1, round(height * PLACEHOLDER_WIDTH / width))
+    tiny = rgb.resize((PLACEHOLDER_WIDTH, placeholder_height), Image.BOX).filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    if _supported('webp'):
+        tiny.save(buffer, 'WEBP', quality=40)
+        mime = 'image/webp'
+    else:
+        tiny.save(buffer, 'JPEG', quality=40)
+        mime = 'image/jpeg'
+    
+    return {
+        'width': width,
+        'height': height,
+        'aspect_ratio': round(width / height, 4),
+        'dominant_color': f'#{r:02x}{g:02x}{b:02x}',
+        'placeholder': f'data:{mime};base64,{base64.b64encode(buffer.getvalue()).decode("ascii")}',
+    }
+
+def build_derivatives(source_path, output_dir, url_prefix, widths, formats):
+    """Resize one image into every width/format pair (runs in a worker process)
+    
+    Outputs are named after the source's content hash, and a manifest next to
+    them records the result, so an unchanged source is never processed twice.
+    Returns the manifest: source hash, image_metadata() fields and the srcset
+    entries per format.
+    """
+    content_hash = file_hash(source_path)
+    key = content_hash[:16]
+    manifest_path = os.path.join(output_dir, f'{key}.json')
+    
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        files_present = all(
+            os.path.exists(os.path.join(output_dir, os.path.basename(entry['url'])))
+            for entries in manifest['sources'].values() for entry in entries
+        )
+        if not files_present:
+            manifest = None
+        elif 'placeholder' in manifest:
+            return manifest
+    
+    os.makedirs(output_dir, exist_ok=True)
+    with Image.open(source_path) as original:
+        original.load()
+        metadata = image_metadata(original)
+        
+        if manifest is not None:
+            # Derivatives are current, only the metadata is missing
+            manifest.update(metadata)
+            atomic_write(manifest_path, json.dumps(manifest, indent=2))
+            return manifest
+        
+        width, height = original.size
+        # Never upscale; an image narrower than every width gets one derivative at its own size
+        target_widths = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+        
+        sources = {}
+        for fmt in formats:
+            if not _supported(fmt):
+                continue
+            pil_format, options = FORMATS[fmt]
+            entries = []
+            for target_width in target_widths:
+                target_height = round(height * target_width / width)
+                resized = original.resize((target_width, target_height), Image.LANCZOS) if target_width != width else original.copy()
+                if fmt == 'jpeg' and resized.mode not in ('RGB', 'L'):
+                    background = Image.new('RGB', resized.size, (255, 255, 255))
+                    background.paste(resized, mask=resized.convert('RGBA').getchannel('A'))
+                    resized = background
+                elif resized.mode not in ('RGB', 'RGBA', 'L'):
+                    resized = resized.convert('RGBA')
+                
+                name = f'{key}-{target_width}.{fmt}'
+                resized.save(os.path.join(output_dir, name), pil_format, **options)
+                entries.append({'url': f'{url_prefix}/{name}', 'width': target_width})
+            sources[fmt] = entries
+    
+    manifest = {'hash': content_hash, **metadata, 'sources': sources}
+    atomic_write(manifest_path, json.dumps(manifest, indent=2))
+    return manifest
+
+class ImagePipeline:
+    """Generates responsive derivatives and placeholder metadata of local gallery images in a process pool
+    
+    submit() returns immediately; when the derivatives are ready `on_done`
+    is called with the gallery image id, the URL that was processed and the
+    manifest from build_derivatives().
+    """
+    
+    def __init__(self, site_root, output_dir, widths=(480, 960, 1600), formats=('avif', 'webp', 'jpeg'),
+                 max_workers=2, on_done=None, enabled=True):
+        self.site_root = os.path.abspath(site_root)
+        self.output_dir = os.path.abspath(output_dir)
+        self.url_prefix = os.path.relpath(self.output_dir, self.site_root).replace(os.sep, '/')
+        self.widths = tuple(widths)
+        self.formats = tuple(formats)
+        self.max_workers = max_workers
+        self.on_done = on_done
+        self.enabled = enabled and Image is not None
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._errors = {}
+    
+    def local_path(self, url):
+        """Filesystem path of a gallery URL that points inside the site, else None"""
+        if not url:
+            return None
+        parsed = urlparse(url)
+        if parsed.scheme or parsed.netloc:
+            return None
+        path = os.path.abspath(os.path.join(self.site_root, unquote(parsed.path).lstrip('/')))
+        if os.path.commonpath([path, self.site_root]) != self.site_root or not os.path.isfile(path):
+            return None
+        return path
+    
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+    
+    def submit(self, image):
+        """Queue derivative generation for a gallery record. Returns the future, or None if not applicable"""
+        source_path = self.local_path(image.get('url')) if self.enabled else None
+        if not source_path:
+            return None
+        
+        future = self._get_executor().submit(
+            build_derivatives, source_path, self.output_dir, self.url_prefix, self.widths, self.formats
+        )
+        future.add_done_callback(lambda f: self._finished(image['id'], image['url'], f))
+        return future
+    
+    def _finished(self, image_id, url, future):
+        try:
+            manifest = future.result()
+        except Exception as e:
+            self._errors[image_id] = str(e)
+            return
+        self._errors.pop(image_id, None)
+        if self.on_done:
+            self.on_done(image_id, url, manifest)
+    
+    def errors(self):
+        """Last processing error per gallery image id"""
+        return dict(self._errors)
+    
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
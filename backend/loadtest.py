@@ -0,0 +1,367 @@
+"""
+Concurrent Load Test for Shiv's Photography Backend
+
+Starts one or more backend processes on localhost against a temporary copy
+of the site (data/, index.html and a scratch git repository), then lets
+several client threads hammer them for a while: editors creating, updating
+and deleting reviews, FAQs and gallery images, mixed with dashboard-style
+reads of the list endpoints, search and /git/status.
+
+Afterwards it reports throughput, p50/p95/p99 latency per operation and
+error counts, and checks that the data survived intact:
+  - every data file parses and has unique ids,
+  - exactly the records the clients created (minus the ones they deleted) exist,
+  - index.html equals a fresh render of the stored data.
+
+Usage:
+    python loadtest.py                                # 8 clients, 20% writes, 20 seconds, 1 server
+    python loadtest.py --clients 16 --write-ratio 0.5 --duration 60 --servers 3
+    STORAGE_BACKEND=sqlite python loadtest.py
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from benchmark import make_faq, make_image, make_review, percentile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SITE_HTML = os.path.join(BASE_DIR, '..', 'index.html')
+
+# Operation name -> relative weight, within reads and within writes
+READS = {
+    'GET /api/reviews': 25,
+    'GET /api/faqs': 15,
+    'GET /api/gallery?limit': 15,
+    'GET /api/reviews?min_rating&sort': 10,
+    'GET /api/search': 15,
+    'GET /git/status': 15,
+    'GET /api/render/status': 5,
+}
+WRITES = {
+    'POST /api/reviews': 25,
+    'PUT /api/reviews/<id>': 20,
+    'DELETE /api/reviews/<id>': 10,
+    'POST /api/faqs': 15,
+    'PUT /api/faqs/<id>': 10,
+    'POST /api/gallery/bulk': 10,
+    'DELETE /api/gallery/<id>': 10,
+}
+
+# ========== SERVER ==========
+
+def serve(port):
+    """Run the backend on localhost (used by the load test's server processes)"""
+    from werkzeug.serving import WSGIRequestHandler, run_simple
+    sys.path.insert(0, BASE_DIR)
+    import app as backend
+    WSGIRequestHandler.protocol_version = 'HTTP/1.1'  # keep-alive
+    run_simple('127.0.0.1', port, backend.app, threaded=True, use_reloader=False, use_debugger=False)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def prepare_site(workdir):
+    """Scratch site: index.html, an empty data dir and a git repository for /git/status"""
+    shutil.copy(SITE_HTML, os.path.join(workdir, 'index.html'))
+    os.makedirs(os.path.join(workdir, 'data'))
+    try:
+        for command in (['git', 'init', '-q'], ['git', 'add', 'index.html'],
+                        ['git', '-c', 'user.name=loadtest', '-c', 'user.email=loadtest@localhost', 'commit', '-q', '-m', 'init']):
+            subprocess.run(command, cwd=workdir, check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        print("! git not available, /git/status requests will fail")
+
+def start_servers(workdir, count):
+    env = dict(
+        os.environ,
+        DATA_DIR=os.path.join(workdir, 'data'),
+        HTML_FILE=os.path.join(workdir, 'index.html'),
+        SQLITE_DATABASE=os.path.join(workdir, 'data', 'content.db'),
+        GIT_REPO_PATH=workdir,
+        IMAGE_PIPELINE_ENABLED='false',
+    )
+    servers = []
+    for _ in range(count):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', str(port)],
+            cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        servers.append((process, port))
+    
+    for process, port in servers:
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f'Backend on port {port} did not start')
+                time.sleep(0.1)
+    return servers
+
+# ========== CLIENTS ==========
+
+class Client:
+    """One simulated user: a keep-alive connection plus the records it created"""
+    
+    def __init__(self, ports, write_ratio, seed, stats):
+        self.ports = ports
+        self.write_ratio = write_ratio
+        self.rng = random.Random(seed)
+        self.stats = stats
+        self.connections = {}
+        self.own = defaultdict(list)  # collection -> ids this client created and has not deleted
+    
+    def request(self, method, path, body=None):
+        """(status, parsed JSON or None); status 0 on connection errors"""
+        port = self.rng.choice(self.ports)
+        for attempt in range(2):
+            connection = self.connections.get(port)
+            if connection is None:
+                connection = self.connections[port] = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            try:
+                payload = json.dumps(body) if body is not None else None
+                connection.request(method, path, payload, {'Content-Type': 'application/json'} if payload else {})
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                self.connections.pop(port, None)
+                if attempt:
+                    return 0, None
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, ValueError
+    
+    def pick(self, weights):
+        return self.rng.choices(list(weights), list(weights.values()))[0]
+    
+    def run(self, deadline):
+        while time.monotonic() < deadline:
+            operation = self.pick(WRITES if self.rng.random() < self.write_ratio else READS)
+            started = time.perf_counter()
+            outcome = self.perform(operation)
+            if outcome is None:
+                continue
+            ok, corrupt = outcome
+            self.stats.record(operation, time.perf_counter() - started, ok, corrupt)
+    
+    def perform(self, operation):
+        """Run one operation, returns (succeeded, response was corrupt), None if there was nothing to do"""
+        rng = self.rng
+        method, path = operation.split(' ')
+        collection = path.split('/')[2].split('?')[0] if path.startswith('/api/') else None
+        
+        if operation == 'GET /api/gallery?limit':
+            path = '/api/gallery?limit=50'
+        elif operation == 'GET /api/reviews?min_rating&sort':
+            path = '/api/reviews?min_rating=4&sort=-rating&limit=20'
+        elif operation == 'GET /api/search':
+            path = f"/api/search?q={rng.choice(['wedding', 'phot', 'amazing team', 'candid'])}".replace(' ', '%20')
+        
+        if method == 'GET':
+            status, data = self.request('GET', path)
+            if data is ValueError:
+                return False, True
+            if path in ('/api/reviews', '/api/faqs') and status == 200 and not isinstance(data, list):
+                return False, True
+            return status == 200, False
+        
+        if operation == 'POST /api/gallery/bulk':
+            operations = [{'op': 'create', 'data': {**make_image(rng, 0), 'url': f'https://example.com/{rng.random()}.jpg'}}
+                          for _ in range(3)]
+            status, data = self.request('POST', path, {'operations': operations})
+            if status == 200 and isinstance(data, dict):
+                self.own['gallery'] += [result['id'] for result in data['results']]
+                return True, False
+            return False, data is ValueError
+        
+        if method == 'POST':
+            status, data = self.request('POST', path, make_review(rng) if collection == 'reviews' else make_faq(rng))
+            if status == 200 and isinstance(data, dict):
+                self.own[collection].append(data['review' if collection == 'reviews' else 'faq']['id'])
+                return True, False
+            return False, data is ValueError
+        
+        # PUT/DELETE work on this client's own records, so no other client can race them away
+        if not self.own[collection]:
+            return None
+        item_id = rng.choice(self.own[collection])
+        path = path.replace('<id>', str(item_id))
+        if method == 'PUT':
+            fields = {'title': make_review(rng)['title']} if collection == 'reviews' else {'answer': make_faq(rng)['answer']}
+            status, data = self.request('PUT', path, fields)
+        else:
+            status, data = self.request('DELETE', path)
+            if status == 200:
+                self.own[collection].remove(item_id)
+        return status == 200, data is ValueError
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.corrupt = 0
+    
+    def record(self, operation, seconds, ok, corrupt):
+        with self.lock:
+            self.latencies[operation].append(seconds * 1000)
+            if not ok:
+                self.errors[operation] += 1
+            if corrupt:
+                self.corrupt += 1
+
+# ========== CONSISTENCY ==========
+
+def wait_for_renders(ports, timeout=30):
+    deadline = time.monotonic() + timeout
+    for port in ports:
+        while time.monotonic() < deadline:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            connection.request('GET', '/api/render/status')
+            status = json.loads(connection.getresponse().read())['status']
+            connection.close()
+            if not status['pending']:
+                break
+            time.sleep(0.2)
+
+def check_consistency(workdir, clients):
+    """List of problems found in the data files and index.html"""
+    sys.path.insert(0, BASE_DIR)
+    from html_updater import HTMLUpdater
+    from storage import COLLECTIONS, JSONStorage, SQLiteStorage
+    
+    problems = []
+    data_dir = os.path.join(workdir, 'data')
+    if os.environ.get('STORAGE_BACKEND', 'json') == 'sqlite':
+        storage = SQLiteStorage(os.path.join(data_dir, 'content.db'))
+    else:
+        for name in sorted(os.listdir(data_dir)):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(data_dir, name), 'r', encoding='utf-8') as f:
+                        json.load(f)
+                except ValueError as e:
+                    problems.append(f'{name} is not valid JSON: {e}')
+        if problems:
+            return problems
+        storage = JSONStorage(data_dir)
+    
+    for collection in COLLECTIONS:
+        ids = [item['id'] for item in storage.list(collection)]
+        if len(ids) != len(set(ids)):
+            problems.append(f'{collection}: duplicate ids')
+        expected = set()
+        for client in clients:
+            expected.update(client.own[collection])
+        missing, extra = expected - set(ids), set(ids) - expected
+        if missing:
+            problems.append(f'{collection}: {len(missing)} created records missing (lost writes)')
+        if extra:
+            problems.append(f'{collection}: {len(extra)} records that should have been deleted')
+    
+    html_file = os.path.join(workdir, 'index.html')
+    expected_html = os.path.join(workdir, 'expected.html')
+    shutil.copy(html_file, expected_html)
+    HTMLUpdater(expected_html).update_sections(**{collection: storage.list(collection) for collection in COLLECTIONS})
+    with open(html_file, 'rb') as actual, open(expected_html, 'rb') as expected:
+        if actual.read() != expected.read():
+            problems.append('index.html does not match the stored data')
+    return problems
+
+# ========== REPORT ==========
+
+def report(stats, elapsed):
+    total = sum(len(samples) for samples in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    print(f"\n{'operation':<36} {'count':>7} {'errors':>7} {'p50':>9} {'p95':>9} {'p99':>9} ms")
+    everything = []
+    for operation in sorted(stats.latencies):
+        samples = sorted(stats.latencies[operation])
+        everything += samples
+        print(f"{operation:<36} {len(samples):>7} {stats.errors[operation]:>7} "
+              f"{percentile(samples, 0.5):>9.2f} {percentile(samples, 0.95):>9.2f} {percentile(samples, 0.99):>9.2f}")
+    everything.sort()
+    if everything:
+        print(f"{'all':<36} {total:>7} {errors:>7} {percentile(everything, 0.5):>9.2f} "
+              f"{percentile(everything, 0.95):>9.2f} {percentile(everything, 0.99):>9.2f}")
+    print(f"\nThroughput: {total / elapsed:.1f} requests/s over {elapsed:.1f}s")
+    print(f"Errors: {errors}   Corrupt responses: {stats.corrupt}")
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test against local backend processes')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent client threads')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='share of requests that write (0-1)')
+    parser.add_argument('--duration', type=float, default=20, help='seconds of load')
+    parser.add_argument('--servers', type=int, default=1, help='backend processes sharing the data directory')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve(args.serve)
+        return
+    
+    print("=" * 60)
+    print("BACKEND LOAD TEST")
+    print("=" * 60)
+    print(f"{args.clients} clients, {args.write_ratio:.0%} writes, {args.duration:g}s, "
+          f"{args.servers} server process(es), {os.environ.get('STORAGE_BACKEND', 'json')} storage")
+    
+    workdir = tempfile.mkdtemp(prefix='shiv-loadtest-')
+    servers = []
+    try:
+        prepare_site(workdir)
+        servers = start_servers(workdir, args.servers)
+        ports = [port for _, port in servers]
+        
+        stats = Stats()
+        clients = [Client(ports, args.write_ratio, args.seed + i, stats) for i in range(args.clients)]
+        started = time.monotonic()
+        deadline = started + args.duration
+        threads = [threading.Thread(target=client.run, args=(deadline,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        
+        errors = report(stats, elapsed)
+        wait_for_renders(ports)
+        problems = check_consistency(workdir, clients)
+    finally:
+        for process, _ in servers:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    print("\nConsistency:")
+    for problem in problems:
+        print(f"✗ {problem}")
+    if not problems:
+        print("✓ data files and index.html are consistent")
+    
+    if errors or stats.corrupt or problems:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
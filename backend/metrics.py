@@ -0,0 +1,144 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+    
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def lines(self, name, labels):
+        """Prometheus text lines for this histogram"""
+        label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+        prefix = label_text + ',' if label_text else ''
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label_text}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{label_text}}} {self.count}')
+        return lines
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class _NullTimer:
+    """Shared do-nothing timer handed out while metrics are disabled"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    def __init__(self, metrics, phase):
+        self.metrics = metrics
+        self.phase = phase
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.phase, time.perf_counter() - self.started)
+        return False
+
+class Metrics:
+    """Latency histograms of the backend's hot paths
+    
+    Code wraps a phase in `with metrics.timer('html_write'):`. Every timing
+    lands in a per-phase histogram, exported by /metrics in the Prometheus
+    text format, and in the breakdown of the request running on the same
+    thread, which becomes its Server-Timing header. Work done on background
+    threads (deferred renders, queued publishes) shows up in the histograms
+    only.
+    
+    While disabled, timer() returns a shared no-op object, so an
+    instrumented call costs one attribute check.
+    """
+    
+    def __init__(self, enabled=False, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._phases = {}  # phase -> Histogram
+        self._requests = {}  # (method, endpoint, status) -> Histogram
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def timer(self, phase):
+        """Context manager timing one phase"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, phase)
+    
+    def observe(self, phase, seconds):
+        with self._lock:
+            histogram = self._phases.get(phase)
+            if histogram is None:
+                histogram = self._phases[phase] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        breakdown = getattr(self._local, 'breakdown', None)
+        if breakdown is not None:
+            breakdown[phase] = breakdown.get(phase, 0.0) + seconds
+    
+    def start_request(self):
+        """Begin collecting the phase breakdown of the request on this thread"""
+        self._local.breakdown = {}
+        self._local.started = time.perf_counter()
+    
+    def finish_request(self, method, endpoint, status):
+        """Record the request's duration, returns its Server-Timing header value"""
+        breakdown = getattr(self._local, 'breakdown', None)
+        if breakdown is None:
+            return None
+        duration = time.perf_counter() - self._local.started
+        self._local.breakdown = None
+        
+        key = (method, endpoint or 'unmatched', str(status))
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram(self.buckets)
+            histogram.observe(duration)
+        
+        entries = [f'{phase};dur={seconds * 1000:.2f}' for phase, seconds in breakdown.items()]
+        entries.append(f'total;dur={duration * 1000:.2f}')
+        return ', '.join(entries)
+    
+    def render(self):
+        """All histograms in the Prometheus text exposition format"""
+        lines = [
+            '# HELP backend_phase_seconds Time spent in instrumented backend phases.',
+            '# TYPE backend_phase_seconds histogram',
+        ]
+        with self._lock:
+            for phase in sorted(self._phases):
+                lines += self._phases[phase].lines('backend_phase_seconds', [('phase', phase)])
+            lines += [
+                '# HELP backend_request_seconds Time spent handling HTTP requests.',
+                '# TYPE backend_request_seconds histogram',
+            ]
+            for method, endpoint, status in sorted(self._requests):
+                lines += self._requests[(method, endpoint, status)].lines(
+                    'backend_request_seconds', [('method', method), ('endpoint', endpoint), ('status', status)]
+                )
+        return '\n'.join(lines) + '\n'
+
+# Process-wide registry; app.py enables it from the METRICS_ENABLED setting
+metrics = Metrics()
@@ -0,0 +1,56 @@
+"""
+JSON to SQLite Migrator for Shiv's Photography Backend
+
+Copies reviews, FAQs, gallery images and reels from data/*.json into the
+SQLite database used when STORAGE_BACKEND=sqlite. Existing ids are kept.
+
+Usage:
+    python migrate_to_sqlite.py          # skip collections already in the database
+    python migrate_to_sqlite.py --force  # overwrite records with the same id
+"""
+
+import os
+import sys
+from config import Config
+from content_store import ContentStore
+from storage import COLLECTIONS, SQLiteStorage
+
+def migrate(data_dir, db_path, force=False):
+    """Copy every JSON collection into the database, returning the number of records per collection"""
+    content_store = ContentStore()
+    database = SQLiteStorage(db_path)
+    migrated = {}
+    
+    for collection in COLLECTIONS:
+        json_file = os.path.join(data_dir, f'{collection}.json')
+        if not os.path.exists(json_file):
+            print(f"- {collection}: no JSON file, skipped")
+            continue
+        
+        if database.count(collection) and not force:
+            print(f"- {collection}: already in the database, skipped (use --force to overwrite)")
+            continue
+        
+        items = content_store.get(json_file)
+        counters = content_store.get(os.path.join(data_dir, 'counters.json'), default={})
+        database.import_items(collection, items, last_id=counters.get(collection, 0))
+        migrated[collection] = len(items)
+        print(f"✓ {collection}: {len(items)} records migrated")
+    
+    return migrated
+
+def main():
+    force = '--force' in sys.argv[1:]
+    
+    print("=" * 60)
+    print("MIGRATING JSON DATA TO SQLITE")
+    print("=" * 60)
+    print(f"\nSource:   {Config.DATA_DIR}")
+    print(f"Database: {Config.SQLITE_DATABASE}\n")
+    
+    migrate(Config.DATA_DIR, Config.SQLITE_DATABASE, force=force)
+    
+    print("\nDone. Start the backend with STORAGE_BACKEND=sqlite to use the database.")
+
+if __name__ == '__main__':
+    main()
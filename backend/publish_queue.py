@@ -0,0 +1,301 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from atomic_file import atomic_write, file_lock
+
+FINISHED = ('done', 'failed')
+IN_FLIGHT = ('committing', 'pushing', 'retrying')
+
+def batch_message(messages):
+    """One commit message for several publish requests"""
+    messages = list(dict.fromkeys(messages))
+    if len(messages) == 1:
+        return messages[0]
+    return f'{messages[0]} (+{len(messages) - 1} more)\n\n' + '\n'.join(f'- {message}' for message in messages)
+
+class PublishJobs:
+    """Publish jobs kept in a JSON file, so every worker process sees every job
+    
+    Each read-modify-write holds the file's lock. Besides the jobs (oldest
+    first, at most `history` of them once finished) the file records whether
+    a commit is still waiting to be pushed.
+    """
+    
+    def __init__(self, path, history=100):
+        self.path = path
+        self.history = history
+    
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'jobs': [], 'unpushed': False}
+    
+    @contextmanager
+    def _edit(self):
+        with file_lock(self.path):
+            state = self._load()
+            yield state
+            atomic_write(self.path, json.dumps(state, indent=2))
+    
+    def add(self, job):
+        with self._edit() as state:
+            jobs = state['jobs']
+            jobs.append(job)
+            while len(jobs) > self.history and jobs[0]['status'] in FINISHED:
+                jobs.pop(0)
+    
+    def get(self, job_id):
+        with file_lock(self.path, shared=True):
+            state = self._load()
+        return next((job for job in state['jobs'] if job['id'] == job_id), None)
+    
+    def update(self, job_ids, **fields):
+        with self._edit() as state:
+            for job in state['jobs']:
+                if job['id'] in job_ids:
+                    job.update(fields)
+    
+    def claim_queued(self, **fields):
+        """Take every queued job, of any worker, applying fields to them
+        
+        Only call it holding the publish lock: jobs still in flight then
+        belong to a worker that died mid-publish, and are taken over too.
+        """
+        with self._edit() as state:
+            jobs = [job for job in state['jobs'] if job['status'] == 'queued' or job['status'] in IN_FLIGHT]
+            for job in jobs:
+                job.update(fields)
+        return jobs
+    
+    def in_flight(self):
+        """Whether any job is being published, or was left in flight by a worker that died"""
+        with file_lock(self.path, shared=True):
+            return any(job['status'] in IN_FLIGHT for job in self._load()['jobs'])
+    
+    def unpushed(self):
+        with file_lock(self.path, shared=True):
+            return self._load().get('unpushed', False)
+    
+    def set_unpushed(self, unpushed):
+        with self._edit() as state:
+            state['unpushed'] = unpushed
+
+class PublishQueue:
+    """Commits and pushes on a background thread
+    
+    submit() records a job and returns at once. The worker waits `window`
+    seconds after the first queued job, then publishes every job queued by
+    then as a single commit. A failed commit or push is retried `retries`
+    times, `backoff` seconds apart and doubling; commits whose push finally
+    failed are pushed with the next publish.
+    
+    Jobs live in `jobs_file` and publishing holds a lock next to it, so with
+    several worker processes any of them can report any job, git never runs
+    twice at the same time, and whichever worker publishes first takes the
+    jobs queued by the others too.
+    
+    Job states: queued -> committing -> pushing (-> retrying) -> done | failed.
+    A job left in flight by a worker that died is published again by the
+    next publish (see recover()).
+    """
+    
+    def __init__(self, git_manager, jobs_file, branch='main', window=2.0, retries=3, backoff=2.0,
+                 render_worker=None, output_builder=None, background=True, history=100):
+        self.git_manager = git_manager
+        self.jobs = PublishJobs(jobs_file, history)
+        self.branch = branch
+        self.window = window
+        self.retries = retries
+        self.backoff = backoff
+        self.render_worker = render_worker
+        self.output_builder = output_builder
+        self.background = background
+        
+        self._condition = threading.Condition()
+        self._queued = 0
+        self._first_queued_at = None
+        self._stopping = False
+        self._thread = None
+        # Cross-process: one publish at a time per jobs file
+        self._publish_lock_path = os.path.join(os.path.dirname(os.path.abspath(jobs_file)), 'publish')
+    
+    def start(self):
+        """Start the worker thread (idempotent)"""
+        with self._condition:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='publish-queue', daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout=None):
+        """Publish whatever is still queued, then stop the worker thread"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def recover(self):
+        """Schedule a publish if jobs were left in flight, e.g. by a worker that died mid-publish
+        
+        The publish waits for the publish lock, which a live owner still
+        holds; jobs still in flight once it has the lock are taken over.
+        """
+        if not self.jobs.in_flight():
+            return
+        with self._condition:
+            if not self._queued:
+                self._first_queued_at = time.monotonic()
+            self._queued += 1
+            self._condition.notify_all()
+        if not self.background:
+            self.flush()
+        elif not (self._thread and self._thread.is_alive()):
+            self.start()
+    
+    def submit(self, message):
+        """Queue a publish, returns a snapshot of its job"""
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'queued',
+            'message': message,
+            'created_at': datetime.now().isoformat(),
+            'finished_at': None,
+            'batch_size': None,
+            'attempts': 0,
+            'paths': [],
+            'result': None,
+            'error': None,
+        }
+        self.jobs.add(job)
+        with self._condition:
+            if not self._queued:
+                self._first_queued_at = time.monotonic()
+            self._queued += 1
+            self._condition.notify_all()
+        
+        if not self.background:
+            self.flush()
+            return self.job(job['id'])
+        if not (self._thread and self._thread.is_alive()):
+            self.start()
+        return job
+    
+    def job(self, job_id):
+        """Snapshot of a job, None if unknown"""
+        return self.jobs.get(job_id)
+    
+    def wait(self, job_id, timeout=None, interval=0.2):
+        """Block until a job has finished, returns its snapshot (unfinished on timeout)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        job = self.job(job_id)
+        while job and job['status'] not in FINISHED:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            time.sleep(interval if remaining is None else min(interval, remaining))
+            job = self.job(job_id)
+        return job
+    
+    def flush(self):
+        """Publish all queued jobs now, on the calling thread"""
+        with self._condition:
+            self._take_queued()
+        self._publish()
+    
+    def _take_queued(self):
+        """Reset the local trigger (caller holds the condition)"""
+        queued = self._queued
+        self._queued = 0
+        self._first_queued_at = None
+        return queued
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queued and not self._stopping:
+                    self._condition.wait()
+                if not self._queued and self._stopping:
+                    return
+                
+                # Collect everything requested within the window into one commit
+                while self._queued and not self._stopping:
+                    remaining = self._first_queued_at + self.window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                
+                queued = self._take_queued()
+            
+            if queued:
+                self._publish()
+    
+    def _update(self, jobs, **fields):
+        self.jobs.update({job['id'] for job in jobs}, **fields)
+    
+    def _retrying(self, jobs, action):
+        """Run action, retrying with backoff. Raises the last error once the retries are used up"""
+        for attempt in range(1, self.retries + 2):
+            self._update(jobs, attempts=attempt)
+            try:
+                return action()
+            except Exception as e:
+                if attempt > self.retries or self._stopping:
+                    raise
+                self._update(jobs, status='retrying', error=str(e))
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+    
+    def _publish(self):
+        """Commit and push every queued job, of this worker or any other, as one batch"""
+        with file_lock(self._publish_lock_path):
+            jobs = self.jobs.claim_queued(status='committing')
+            if not jobs:
+                return  # another worker published them already
+            self._update(jobs, batch_size=len(jobs))
+            try:
+                if not self.git_manager.is_git_repo():
+                    raise Exception("Not a git repository. Please run setup_git.py first or initialize git manually.")
+                if not self.git_manager.has_remote():
+                    raise Exception("No remote repository configured. Please add a remote first.")
+                
+                # Include the edits whose render is still pending
+                if self.render_worker:
+                    self.render_worker.wait(timeout=30)
+                if self.output_builder:
+                    self.output_builder.wait(timeout=30)
+                
+                message = batch_message(job['message'] for job in jobs)
+                paths = self._retrying(jobs, lambda: self.git_manager.commit_changes(message))
+            except Exception as e:
+                self._fail(jobs, e)
+                return
+            
+            if not paths and not self.jobs.unpushed():
+                self._update(jobs, status='done', error=None, result="No changes to commit. Working tree is clean.",
+                             finished_at=datetime.now().isoformat())
+                return
+            
+            self.jobs.set_unpushed(True)
+            self._update(jobs, status='pushing', paths=paths, error=None)
+            try:
+                self._retrying(jobs, lambda: self.git_manager.push(self.branch))
+            except Exception as e:
+                self._fail(jobs, e)
+                return
+            
+            self.jobs.set_unpushed(False)
+            self._update(jobs, status='done', error=None, finished_at=datetime.now().isoformat(),
+                         result=f"✓ Successfully committed and pushed: {jobs[0]['message']}" if len(jobs) == 1
+                         else f"✓ Successfully committed and pushed {len(jobs)} publishes")
+    
+    def _fail(self, jobs, error):
+        self._update(jobs, status='failed', error=self.git_manager.describe_error(error) or str(error),
+                     finished_at=datetime.now().isoformat())
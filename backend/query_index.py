@@ -0,0 +1,133 @@
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right, insort
+
+def sort_key(value):
+    """Total order over field values, as in SQLite: missing < numbers < text"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    return (2, str(value))
+
+def encode_cursor(sort, value, item_id):
+    """Opaque cursor pointing just after a record in `sort` order"""
+    raw = json.dumps([sort, value, item_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, sort):
+    """(value, id) of a cursor made by encode_cursor for the same sort field"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, item_id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if cursor_sort != sort or not isinstance(item_id, int):
+        raise ValueError('Cursor does not match the requested sort')
+    return value, item_id
+
+class CollectionIndex:
+    """Sorted views of one collection's records, one per indexed field
+    
+    Each view is a list of (sort_key(value), id) pairs kept in order with
+    bisect, so an equality or minimum filter is a contiguous slice and a new
+    or changed record costs one insort per field instead of a rebuild.
+    """
+    
+    def __init__(self, fields, items=()):
+        self.fields = ('id',) + tuple(fields)
+        self.ordered = {
+            field: sorted((sort_key(item.get(field)), item['id']) for item in items)
+            for field in self.fields
+        }
+    
+    def copy(self):
+        """Independent copy to modify while readers keep using this one"""
+        index = CollectionIndex.__new__(CollectionIndex)
+        index.fields = self.fields
+        index.ordered = {field: list(entries) for field, entries in self.ordered.items()}
+        return index
+    
+    def add(self, item):
+        for field in self.fields:
+            insort(self.ordered[field], (sort_key(item.get(field)), item['id']))
+    
+    def remove(self, item):
+        for field in self.fields:
+            entries = self.ordered[field]
+            entry = (sort_key(item.get(field)), item['id'])
+            position = bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+    
+    def replace(self, old, new):
+        for field in self.fields:
+            if sort_key(old.get(field)) != sort_key(new.get(field)):
+                entries = self.ordered[field]
+                del entries[bisect_left(entries, (sort_key(old.get(field)), old['id']))]
+                insort(entries, (sort_key(new.get(field)), new['id']))
+    
+    def _range(self, field, low, exact=False):
+        """Slice bounds of records whose field is >= low (== low if exact)"""
+        entries = self.ordered[field]
+        start = bisect_left(entries, (sort_key(low),))
+        end = bisect_right(entries, (sort_key(low), float('inf'))) if exact else len(entries)
+        return start, end
+    
+    def query(self, equals=None, minimum=None, sort='id', descending=False, offset=0, limit=None, after=None):
+        """Ids of one page of matching records
+        
+        equals/minimum map indexed fields to values. `after` is the
+        (value, id) of the last record of the previous page. Returns
+        (ids, total matches, whether more records follow the page).
+        """
+        conditions = [(field, value, True) for field, value in (equals or {}).items()]
+        conditions += [(field, value, False) for field, value in (minimum or {}).items()]
+        for field, _, _ in conditions:
+            if field not in self.ordered:
+                raise ValueError(f"Cannot filter on '{field}'")
+        if sort not in self.ordered:
+            raise ValueError(f"Cannot sort by '{sort}'")
+        
+        entries = self.ordered[sort]
+        low, high = 0, len(entries)
+        allowed = None
+        for field, value, exact in conditions:
+            start, end = self._range(field, value, exact=exact)
+            if field == sort:
+                low, high = max(low, start), min(high, end)
+            else:
+                ids = {item_id for _, item_id in self.ordered[field][start:end]}
+                allowed = ids if allowed is None else allowed & ids
+        high = max(low, high)
+        
+        if allowed is None:
+            total = high - low
+        elif low == 0 and high == len(entries):
+            total = len(allowed)
+        else:
+            total = sum(1 for _, item_id in entries[low:high] if item_id in allowed)
+        
+        if after is not None:
+            cursor = (sort_key(after[0]), after[1])
+            if descending:
+                high = max(low, bisect_left(entries, cursor, low, high))
+            else:
+                low = min(high, bisect_right(entries, cursor, low, high))
+        positions = range(high - 1, low - 1, -1) if descending else range(low, high)
+        wanted = None if limit is None else offset + limit + 1
+        
+        if allowed is None:
+            selected = [entries[i][1] for i in positions[offset:wanted]]
+        else:
+            selected = []
+            for i in positions:
+                if entries[i][1] in allowed:
+                    selected.append(entries[i][1])
+                    if wanted is not None and len(selected) >= wanted:
+                        break
+            selected = selected[offset:]
+        
+        more = limit is not None and len(selected) > limit
+        return selected[:limit], total, more
@@ -0,0 +1,189 @@
+import threading
+import time
+from datetime import datetime
+
+class RenderWorker:
+    """Regenerates index.html on a background thread
+    
+    Write routes only persist their data and call request() with the
+    collections they touched. The worker waits until no new request has
+    arrived for `debounce` seconds (but never longer than `max_delay` after
+    the first one), then renders every pending section in a single
+    HTMLUpdater batch from the latest stored data.
+    
+    Each request() bumps a generation number; status() reports the newest
+    requested and the last completed generation. `on_change`, if given, is
+    called after every request() and every render, i.e. whenever the backend
+    has changed files on disk. `on_render` is called after each successful
+    render only.
+    """
+    
+    def __init__(self, html_updater, storage, debounce=0.5, max_delay=5.0, background=True, on_change=None,
+                 on_render=None):
+        self.html_updater = html_updater
+        self.storage = storage
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.background = background
+        self.on_change = on_change
+        self.on_render = on_render
+        
+        self._condition = threading.Condition()
+        self._pending = set()
+        self._first_request_at = None
+        self._last_request_at = None
+        self._requested_generation = 0
+        self._completed_generation = 0
+        self._rendering = False
+        self._stopping = False
+        self._thread = None
+        self._render_lock = threading.Lock()
+        
+        self._renders = 0
+        self._last_sections = []
+        self._last_duration = None
+        self._total_duration = 0.0
+        self._last_completed_at = None
+        self._last_error = None
+        self._missing_regions = []
+    
+    def start(self):
+        """Start the worker thread (idempotent)"""
+        with self._condition:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='render-worker', daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout=None):
+        """Render whatever is still pending, then stop the worker thread"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def request(self, *collections):
+        """Schedule a render of the sections showing these collections, returns its generation"""
+        with self._condition:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_request_at = now
+            self._last_request_at = now
+            self._pending.update(collections)
+            self._requested_generation += 1
+            generation = self._requested_generation
+            self._condition.notify_all()
+        
+        if self.on_change:
+            self.on_change()
+        if not self.background:
+            self.flush()
+        elif not (self._thread and self._thread.is_alive()):
+            self.start()
+        return generation
+    
+    def flush(self):
+        """Render all pending sections now, on the calling thread"""
+        with self._condition:
+            sections, generation = self._take_pending()
+        if sections:
+            self._render(sections, generation)
+    
+    def wait(self, generation=None, timeout=None):
+        """Block until `generation` (default: the newest request) has been rendered
+        
+        Returns False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            if generation is None:
+                generation = self._requested_generation
+            while self._completed_generation < generation:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+    
+    def status(self):
+        """Snapshot of the queue for the /api/render/status endpoint"""
+        with self._condition:
+            return {
+                'pending': bool(self._pending) or self._rendering,
+                'pending_sections': sorted(self._pending),
+                'requested_generation': self._requested_generation,
+                'completed_generation': self._completed_generation,
+                'renders': self._renders,
+                'last_sections': self._last_sections,
+                'last_duration_ms': None if self._last_duration is None else round(self._last_duration * 1000, 2),
+                'average_duration_ms': round(self._total_duration / self._renders * 1000, 2) if self._renders else None,
+                'last_completed_at': self._last_completed_at,
+                'last_error': self._last_error,
+                # Regions the last render could not find in the page, so their data is not shown
+                'missing_regions': self._missing_regions,
+            }
+    
+    def _take_pending(self):
+        """Claim the pending sections (caller holds the condition)"""
+        sections = self._pending
+        self._pending = set()
+        self._first_request_at = None
+        if sections:
+            self._rendering = True
+        return sections, self._requested_generation
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if not self._pending and self._stopping:
+                    return
+                
+                # Debounce: keep collecting requests until the burst is over
+                while self._pending and not self._stopping:
+                    deadline = min(self._last_request_at + self.debounce, self._first_request_at + self.max_delay)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                
+                sections, generation = self._take_pending()
+            
+            if sections:
+                self._render(sections, generation)
+    
+    def _render(self, sections, generation):
+        """Render the given sections from the stored data in one HTMLUpdater batch"""
+        error, result = None, None
+        started = time.perf_counter()
+        try:
+            # Read the data only once the HTML file is locked, so a render in another
+            # worker process that read older data cannot overwrite this one
+            with self._render_lock, self.html_updater.batch():
+                result = self.html_updater.update_sections(
+                    **{collection: self.storage.list(collection) for collection in sections}
+                )
+        except Exception as e:
+            error = str(e)
+        duration = time.perf_counter() - started
+        
+        with self._condition:
+            self._rendering = False
+            self._completed_generation = max(self._completed_generation, generation)
+            self._renders += 1
+            self._last_sections = sorted(sections)
+            self._last_duration = duration
+            self._total_duration += duration
+            self._last_completed_at = datetime.now().isoformat()
+            self._last_error = error
+            if result:
+                self._missing_regions = result.get('missing_regions', [])
+            self._condition.notify_all()
+        
+        if self.on_change:
+            self.on_change()
+        if self.on_render and error is None:
+            self.on_render()
@@ -0,0 +1,153 @@
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+# Collection -> searchable field -> weight of a match in that field
+SEARCH_FIELDS = {
+    'reviews': {'title': 3, 'name': 2, 'content': 1},
+    'faqs': {'question': 3, 'answer': 1},
+}
+
+# A query word matches at most this many longer words by prefix
+MAX_PREFIX_TERMS = 64
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+def fold(text):
+    """Lowercase text without diacritics ("Café" -> "cafe")"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(fold(text))
+
+class SearchIndex:
+    """In-memory inverted index over the text fields of reviews and FAQs
+    
+    Routes call index()/remove() after each write, so only the changed
+    record is re-tokenized. Each collection remembers the storage version it
+    is current with, so data written some other way (e.g. by another worker
+    process) makes it rebuild that collection on the next search.
+    
+    Every query word must match a word of the record, exactly or (at lower
+    weight) as a prefix. Results are ranked by field weight x term frequency
+    x inverse document frequency.
+    """
+    
+    def __init__(self, storage, fields=SEARCH_FIELDS):
+        self.storage = storage
+        self.fields = fields
+        self._postings = {}  # term -> {(collection, id): weighted count}
+        self._terms = []  # sorted terms, for prefix lookups
+        self._documents = {}  # (collection, id) -> terms
+        self._versions = {}
+        self._lock = threading.Lock()
+    
+    def _add(self, collection, item):
+        key = (collection, item['id'])
+        weights = {}
+        for field, weight in self.fields[collection].items():
+            value = item.get(field)
+            if isinstance(value, str):
+                for term in tokenize(value):
+                    weights[term] = weights.get(term, 0) + weight
+        
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[key] = weight
+        self._documents[key] = set(weights)
+    
+    def _remove(self, key):
+        for term in self._documents.pop(key, ()):
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+    
+    def _rebuild(self, collection, version):
+        for key in [key for key in self._documents if key[0] == collection]:
+            self._remove(key)
+        for item in self.storage.list(collection):
+            self._add(collection, item)
+        self._versions[collection] = version
+    
+    def _sync(self, collection):
+        """Rebuild a collection if its data changed outside index()/remove()"""
+        version = self.storage.version(collection)
+        if self._versions.get(collection) != version:
+            self._rebuild(collection, version)
+    
+    def index(self, collection, item):
+        """Add or re-index one record after it was created or updated"""
+        if collection not in self.fields:
+            return
+        with self._lock:
+            self._load(collection)
+            self._remove((collection, item['id']))
+            self._add(collection, item)
+            self._versions[collection] = self.storage.version(collection)
+    
+    def remove(self, collection, item_id):
+        """Drop a deleted record"""
+        if collection not in self.fields:
+            return
+        with self._lock:
+            self._load(collection)
+            self._remove((collection, item_id))
+            self._versions[collection] = self.storage.version(collection)
+    
+    def _load(self, collection):
+        """Build a collection that was never loaded, before patching it"""
+        if collection not in self._versions:
+            self._rebuild(collection, None)
+    
+    def _matches(self, word):
+        """{document key: score} for one query word, prefix matches at half weight"""
+        scores = {}
+        start = bisect_left(self._terms, word)
+        for term in self._terms[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(word):
+                break
+            postings = self._postings[term]
+            idf = math.log(1 + len(self._documents) / len(postings))
+            factor = idf if term == word else idf / 2
+            for key, weight in postings.items():
+                score = weight * factor
+                if score > scores.get(key, 0):
+                    scores[key] = score
+        return scores
+    
+    def search(self, query, collections=None, limit=20):
+        """Ranked [{'collection', 'id', 'score', 'item'}] matching every word of the query"""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+        collections = [collection for collection in (collections or self.fields) if collection in self.fields]
+        
+        with self._lock:
+            for collection in collections:
+                self._sync(collection)
+            
+            totals = None
+            # Rarest words first keeps the candidate set small
+            for scores in sorted((self._matches(word) for word in words), key=len):
+                if totals is None:
+                    totals = {key: score for key, score in scores.items() if key[0] in collections}
+                else:
+                    totals = {key: total + scores[key] for key, total in totals.items() if key in scores}
+                if not totals:
+                    return []
+        
+        ranked = sorted(totals.items(), key=lambda entry: (-entry[1], entry[0]))[:limit]
+        results = []
+        for (collection, item_id), score in ranked:
+            item = self.storage.get(collection, item_id)
+            if item:
+                results.append({'collection': collection, 'id': item_id, 'score': round(score, 4), 'item': item})
+        return results
@@ -0,0 +1,264 @@
+"""
+Static Site Generator for Shiv's Photography Backend
+
+Renders the page from a base template plus the stored collections into
+dist/, instead of editing index.html in place. The template is any page
+with region markers (by default index.html itself, which the generator never
+writes); each region is filled with the cards of the collection it shows.
+
+Every section records the hash of its inputs - its collection's records and
+its card template - along with its rendered markup. A rebuild re-renders
+only the sections whose inputs changed and reuses the cached markup of the
+rest, then splices everything into the template.
+
+Usage:
+    python site_generator.py            # full rebuild of every section
+    python site_generator.py --changed  # re-render only the sections whose data or card template changed
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from atomic_file import atomic_write, file_lock
+from content_store import serialize_json
+from html_updater import CARD_TEMPLATE_DIR, VISIBLE_FAQS, HTMLUpdater, index_regions
+from metrics import metrics
+
+CACHE_DIR = '.site'
+MANIFEST_NAME = 'manifest.json'
+
+# Dependency graph: region -> (collection it shows, card template it is built from).
+# The page as a whole also depends on the base template.
+SECTIONS = {
+    'reviews': ('reviews', 'review_card.html'),
+    'more-reviews': ('reviews', 'small_review_card.html'),
+    'faqs': ('faqs', 'faq_item.html'),
+    'more-faqs': ('faqs', 'faq_item.html'),
+    'gallery': ('gallery', 'gallery_item.html'),
+    'reels': ('reels', 'reel_embed.html'),
+}
+
+def sections_for(collections):
+    """Regions that show any of the given collections"""
+    return sorted(name for name, (collection, _) in SECTIONS.items() if collection in collections)
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+class SiteGenerator:
+    """Builds the page from a base template and the stored collections
+    
+    The assembled page is written to <output_dir>/.site/, where an
+    OutputBuilder picks it up to minify and compress it into output_dir.
+    Section markup and the input hashes it was rendered from are cached next
+    to it, so a FAQ edit re-renders the FAQ cards and nothing else.
+    
+    update_sections() and batch() mirror HTMLUpdater, so a RenderWorker can
+    drive the generator in place of the in-place updater.
+    """
+    
+    def __init__(self, template, output_dir, storage=None, card_cache_size=2048):
+        self.template = template
+        self.output_dir = output_dir
+        self.storage = storage
+        self.cache_dir = os.path.join(output_dir, CACHE_DIR)
+        self.page = os.path.join(self.cache_dir, os.path.basename(template))
+        # Only used for card markup; the template is read here, never written
+        self.cards = HTMLUpdater(template, card_cache_size=card_cache_size)
+        # Hashed once: compiled card templates are not reloaded while the process runs
+        self.card_hashes = {card: self._card_hash(card) for _, card in SECTIONS.values()}
+        
+        self._builds = 0
+        self._last = None
+    
+    def _card_hash(self, card):
+        with open(os.path.join(CARD_TEMPLATE_DIR, card), 'rb') as f:
+            return sha256(f.read())
+    
+    def _inputs(self, items, card):
+        """Hash of everything a section's markup is rendered from"""
+        return sha256(serialize_json(items) + self.card_hashes[card].encode('ascii'))
+    
+    def _locked(self):
+        """Lock on the assembled page, shared with other processes building into the same directory"""
+        os.makedirs(self._path('sections'), exist_ok=True)
+        return file_lock(self.page)
+    
+    def _path(self, *names):
+        return os.path.join(self.cache_dir, *names)
+    
+    def _load_manifest(self):
+        try:
+            with open(self._path(MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _cached_markup(self, entry):
+        """Markup saved for a section, None if the cache file is gone"""
+        if entry.get('keep'):
+            return ''
+        try:
+            with open(self._path('sections', entry['file']), 'r', encoding='utf-8', newline='') as f:
+                return f.read()
+        except (KeyError, OSError):
+            return None
+    
+    def _render_section(self, name, items):
+        """Markup of one region, None to keep the template's own content (as HTMLUpdater does)"""
+        cards = self.cards
+        if name == 'reviews':
+            # Main section shows max 3 reviews, the rest go to "More Customer Reviews"
+            return cards._markup(cards._review_card_html, items[:3])
+        if name == 'more-reviews':
+            return cards._markup(cards._small_review_card_html, items[3:]) if len(items) > 3 else None
+        if name == 'faqs':
+            return cards._markup(cards._faq_item_html, items[:VISIBLE_FAQS])
+        if name == 'more-faqs':
+            return cards._markup(cards._faq_item_html, items[VISIBLE_FAQS:])
+        if name == 'gallery':
+            return cards._markup(cards._gallery_item_html, items)
+        return cards._markup(cards._reel_embed_html, items)
+    
+    @contextmanager
+    def batch(self):
+        """Hold the page lock, so data read inside the block is what gets built"""
+        with self._locked():
+            yield self
+    
+    def update_sections(self, reviews=None, faqs=None, gallery=None, reels=None):
+        """Rebuild the sections of the given collections, reusing the cached rest
+        
+        Collections passed as None are left as last built.
+        """
+        data = {'reviews': reviews, 'faqs': faqs, 'gallery': gallery, 'reels': reels}
+        return self.build({collection: items for collection, items in data.items() if items is not None})
+    
+    def build(self, data=None, full=False):
+        """Bring the page up to date, returns what was done
+        
+        `data` maps collections to their current records; sections of the
+        collections in it are re-rendered if their inputs changed. Without
+        it every collection is loaded from storage and checked. Sections of
+        collections left out reuse their cached markup. full=True re-renders
+        every section regardless of the cache.
+        """
+        started = time.perf_counter()
+        if data is None:
+            data = {collection: self.storage.list(collection) for collection, _ in SECTIONS.values()}
+        data = dict(data)
+        
+        with self._locked():
+            manifest = self._load_manifest()
+            entries = manifest.get('sections', {})
+            
+            markup, rendered, reused = {}, [], []
+            for name, (collection, card) in SECTIONS.items():
+                entry = entries.get(name, {})
+                inputs = self._inputs(data[collection], card) if collection in data else entry.get('inputs')
+                cached = None if full or inputs is None or entry.get('inputs') != inputs else self._cached_markup(entry)
+                if cached is not None:
+                    markup[name] = None if entry.get('keep') else cached
+                    reused.append(name)
+                    continue
+                
+                # Changed, or never built: render from the given records or the stored ones
+                if collection not in data:
+                    data[collection] = self.storage.list(collection)
+                    inputs = self._inputs(data[collection], card)
+                items = data[collection]
+                with metrics.timer('site_render'):
+                    markup[name] = self._render_section(name, items)
+                if markup[name] is None:
+                    entries[name] = {'inputs': inputs, 'keep': True}
+                else:
+                    atomic_write(self._path('sections', f'{name}.html'), markup[name])
+                    entries[name] = {'inputs': inputs, 'file': f'{name}.html'}
+                rendered.append(name)
+            
+            with open(self.template, 'r', encoding='utf-8', newline='') as f:
+                content = f.read()
+            
+            # Splice from the last region backwards so earlier offsets stay valid
+            regions = index_regions(content)
+            missing = sorted(name for name in SECTIONS if name not in regions)
+            for name, (start, end) in sorted(regions.items(), key=lambda region: region[1][0], reverse=True):
+                if markup.get(name) is not None:
+                    content = content[:start] + markup[name] + content[end:]
+            
+            page_hash = sha256(content.encode('utf-8'))
+            written = page_hash != manifest.get('page') or not os.path.exists(self.page)
+            if written:
+                with metrics.timer('site_write'):
+                    atomic_write(self.page, content)
+            atomic_write(self._path(MANIFEST_NAME), json.dumps({'page': page_hash, 'sections': entries}, indent=2))
+            
+            result = {
+                'rendered': rendered,
+                'reused': reused,
+                'missing_regions': missing,
+                'written': written,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+                'completed_at': datetime.now().isoformat(),
+            }
+            self._builds += 1
+            self._last = result
+            return result
+    
+    def status(self):
+        return {'page': self.page, 'builds': self._builds, 'last': self._last}
+
+def main():
+    from config import Config
+    from content_store import ContentStore
+    from site_output import OutputBuilder
+    from storage import create_storage
+    from tailwind_build import TailwindBuild
+    
+    parser = argparse.ArgumentParser(description='Render the page from its template and data into the build directory')
+    parser.add_argument('--changed', action='store_true', help='re-render only the sections whose inputs changed')
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("INCREMENTAL BUILD" if args.changed else "FULL BUILD")
+    print("=" * 60)
+    print(f"\nTemplate: {Config.SITE_TEMPLATE}")
+    print(f"Output:   {Config.BUILD_OUTPUT_DIR}\n")
+    
+    generator = SiteGenerator(
+        Config.SITE_TEMPLATE,
+        Config.BUILD_OUTPUT_DIR,
+        create_storage(Config, ContentStore()),
+        card_cache_size=Config.CARD_CACHE_SIZE
+    )
+    result = generator.build(full=not args.changed)
+    for name in SECTIONS:
+        if name in result['missing_regions']:
+            print(f"- {name}: no region markers in the template, skipped")
+        elif name in result['rendered']:
+            print(f"✓ {name}: rendered")
+        else:
+            print(f"- {name}: unchanged, reused")
+    print(f"\nPage {'written' if result['written'] else 'unchanged'} in {result['duration_ms']} ms: {generator.page}")
+    
+    if Config.BUILD_OUTPUT_ENABLED:
+        builder = OutputBuilder(
+            generator.page,
+            Config.BUILD_OUTPUT_DIR,
+            background=False,
+            tailwind=TailwindBuild(Config.BUILD_OUTPUT_DIR, Config.TAILWIND_CLI) if Config.BUILD_TAILWIND else None,
+            base_dir=os.path.dirname(os.path.abspath(Config.SITE_TEMPLATE))
+        )
+        output = builder.build()
+        if output['skipped']:
+            print("Static output already up to date.")
+        else:
+            print(f"Static output: {', '.join(f'{name} {size} B' for name, size in sorted(output['sizes'].items()))}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from urllib.parse import unquote, urlsplit
+
+from atomic_file import atomic_write
+from html_minifier import minify_html, same_structure
+from metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, only .gz siblings are written then
+    brotli = None
+
+MANIFEST_NAME = '.build.json'
+
+# Local files a page refers to: src/href/poster attributes, srcset candidates and CSS url()
+REFERENCE_PATTERN = re.compile(r'''\b(?:src|href|poster)\s*=\s*["']([^"']+)["']|url\(\s*['"]?([^'")]+?)['"]?\s*\)''', re.I)
+SRCSET_PATTERN = re.compile(r'''\bsrcset\s*=\s*["']([^"']+)["']''', re.I)
+EXTERNAL_PATTERN = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|//|#)', re.I)
+# Referenced files that can refer to further files themselves
+SCANNED_EXTENSIONS = ('.html', '.htm', '.css')
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def local_references(text):
+    """URL paths of the local files referenced in HTML or CSS, query and fragment stripped"""
+    refs = [attribute or url for attribute, url in REFERENCE_PATTERN.findall(text)]
+    for srcset in SRCSET_PATTERN.findall(text):
+        refs.extend(candidate.split()[0] for candidate in srcset.split(',') if candidate.strip())
+    paths = []
+    for ref in refs:
+        ref = ref.strip()
+        if ref and not EXTERNAL_PATTERN.match(ref):
+            path = unquote(urlsplit(ref).path)
+            if path:
+                paths.append(path)
+    return paths
+
+def collect_assets(text, base_dir, exclude=()):
+    """Files under base_dir a page needs, as {path relative to base_dir: absolute path}
+    
+    References in linked pages and stylesheets are followed too. Root-absolute
+    URLs (/Book-Now.html) resolve against base_dir, the site root. Files
+    under any of the `exclude` paths are left out, as are references that
+    are missing or point outside base_dir.
+    """
+    base_dir = os.path.abspath(base_dir)
+    exclude = [os.path.abspath(path) for path in exclude]
+    found = {}
+    pending = [(text, base_dir)]
+    while pending:
+        text, directory = pending.pop()
+        for ref in local_references(text):
+            root = base_dir if ref.startswith('/') else directory
+            path = os.path.normpath(os.path.join(root, ref.lstrip('/')))
+            relative = os.path.relpath(path, base_dir)
+            if relative in found or relative.startswith(os.pardir) or not os.path.isfile(path):
+                continue
+            if any(path == excluded or path.startswith(excluded + os.sep) for excluded in exclude):
+                continue
+            found[relative] = path
+            if path.lower().endswith(SCANNED_EXTENSIONS):
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    pending.append((f.read(), os.path.dirname(path)))
+    return found
+
+class OutputBuilder:
+    """Minified, precompressed copy of index.html for static hosting
+    
+    After each render the worker minifies the page into output_dir along with
+    .gz and .br siblings, so a static host can serve them with
+    Content-Encoding directly. index.html itself keeps its formatting and the
+    region markers the renderer needs.
+    
+    The local files the page refers to (images, scripts, stylesheets, linked
+    pages and whatever those refer to) are hard-linked into output_dir at the
+    same relative paths, or copied where hard links are not possible, so the
+    page's relative URLs resolve when output_dir is served on its own.
+    Assets only referenced from JavaScript strings are not found.
+    
+    With a TailwindBuild the Tailwind CDN script is swapped for a purged
+    static stylesheet (see tailwind_build.py). Local scripts it scans for
+    class names are resolved against base_dir, the source's own directory
+    unless the source is a generated copy (see site_generator.py).
+    
+    Builds are incremental: a manifest records the hash of the source the
+    outputs were made from, and an unchanged source costs one read and one
+    hash. Minification and compression run on the builder's own thread, never
+    on the request thread (unless background=False).
+    """
+    
+    def __init__(self, source, output_dir, background=True, gzip_level=9, brotli_quality=11, tailwind=None,
+                 base_dir=None):
+        self.source = source
+        self.base_dir = base_dir or os.path.dirname(os.path.abspath(source))
+        self.output_dir = output_dir
+        self.tailwind = tailwind
+        self.background = background
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        
+        self._condition = threading.Condition()
+        self._requested = 0
+        self._completed = 0
+        self._building = False
+        self._stopping = False
+        self._thread = None
+        self._build_lock = threading.Lock()
+        
+        self._builds = 0
+        self._skipped = 0
+        self._last = None
+        self._last_error = None
+    
+    def start(self):
+        with self._condition:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='output-builder', daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout=None):
+        """Finish a pending build, then stop the worker thread"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def request(self):
+        """Schedule a build of the current source"""
+        with self._condition:
+            self._requested += 1
+            self._condition.notify_all()
+        if not self.background:
+            self.flush()
+        elif not (self._thread and self._thread.is_alive()):
+            self.start()
+    
+    def flush(self):
+        """Build now, on the calling thread, if a build is pending"""
+        with self._condition:
+            generation = self._requested
+            if generation <= self._completed:
+                return
+            self._building = True
+        self._build(generation)
+    
+    def wait(self, timeout=None):
+        """Block until every requested build is done, returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._completed < self._requested:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+    
+    def status(self):
+        with self._condition:
+            return {
+                'pending': self._completed < self._requested or self._building,
+                'builds': self._builds,
+                'skipped': self._skipped,
+                'last': self._last,
+                'last_error': self._last_error,
+            }
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._completed >= self._requested and not self._stopping:
+                    self._condition.wait()
+                if self._completed >= self._requested:
+                    return
+                generation = self._requested
+                self._building = True
+            self._build(generation)
+    
+    def _build(self, generation):
+        result, error = None, None
+        try:
+            with self._build_lock:
+                result = self.build()
+        except Exception as e:
+            error = str(e)
+        
+        with self._condition:
+            self._building = False
+            self._completed = max(self._completed, generation)
+            if result is not None:
+                if result['skipped']:
+                    self._skipped += 1
+                else:
+                    self._builds += 1
+                    self._last = result
+            self._last_error = error
+            self._condition.notify_all()
+    
+    def _path(self, name):
+        return os.path.join(self.output_dir, name)
+    
+    def _load_manifest(self):
+        try:
+            with open(self._path(MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _outputs_present(self, manifest):
+        return all(os.path.exists(self._path(name)) for name in manifest.get('files', {}))
+    
+    def _signature(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+    
+    def _assets_current(self, manifest):
+        """True if every asset of the last build is unchanged at its source and present in output_dir"""
+        if 'assets' not in manifest:
+            return False  # built before assets were linked
+        return all(
+            self._signature(os.path.join(self.base_dir, relative)) == signature and os.path.exists(self._path(relative))
+            for relative, signature in manifest.get('assets', {}).items()
+        )
+    
+    def _link_assets(self, assets, previous):
+        """Put the page's assets into output_dir and drop the ones no longer used, returns their signatures"""
+        signatures = {}
+        for relative, path in sorted(assets.items()):
+            target = self._path(relative)
+            signature = self._signature(path)
+            signatures[relative] = signature
+            if os.path.exists(target) and (previous.get(relative) == signature or os.path.samefile(path, target)):
+                continue  # unchanged, or a hard link that already follows the source
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp = os.path.join(os.path.dirname(target), f'.{os.path.basename(target)}.tmp')
+            if os.path.lexists(temp):
+                os.remove(temp)
+            try:
+                os.link(path, temp)
+            except OSError:  # e.g. output_dir on another filesystem
+                shutil.copy2(path, temp)
+            os.replace(temp, target)
+        for relative in previous:
+            if relative not in assets and os.path.exists(self._path(relative)):
+                os.remove(self._path(relative))
+        return signatures
+    
+    def build(self):
+        """Bring the outputs up to date with the source, returns what was done"""
+        started = time.perf_counter()
+        with open(self.source, 'rb') as f:
+            source = f.read()
+        source_hash = sha256(source)
+        # Outputs depend on the stages too, e.g. a Tailwind CLI installed since the last build
+        stages = {'tailwind_cli': ' '.join(self.tailwind.cli) if self.tailwind and self.tailwind.cli else None}
+        manifest = self._load_manifest()
+        if (manifest.get('source') == source_hash and manifest.get('stages') == stages
+                and self._outputs_present(manifest) and self._assets_current(manifest)):
+            return {'skipped': True}
+        
+        name = os.path.basename(self.source)
+        text = source.decode('utf-8')
+        tailwind = None
+        if self.tailwind:
+            text, tailwind = self.tailwind.apply(text, self.base_dir)
+        with metrics.timer('build_minify'):
+            minified = minify_html(text)
+            # Never ship a page whose elements, attributes or text came out different
+            if not same_structure(text, minified):
+                minified = text
+                note = 'minified markup differed in structure, shipped unminified'
+            else:
+                note = None
+        data = minified.encode('utf-8')
+        data_hash = sha256(data)
+        
+        os.makedirs(self.output_dir, exist_ok=True)
+        files = {name: data_hash}
+        # A source change that minifies to the same bytes (e.g. a comment) reuses the compressed files
+        reuse = manifest.get('files', {}).get(name) == data_hash and self._outputs_present(manifest)
+        if not reuse:
+            atomic_write(self._path(name), data)
+        with metrics.timer('build_compress'):
+            variants = {name + '.gz': lambda: gzip.compress(data, compresslevel=self.gzip_level, mtime=0)}
+            if brotli:
+                variants[name + '.br'] = lambda: brotli.compress(data, quality=self.brotli_quality)
+            for variant, compress in variants.items():
+                if not reuse or variant not in manifest.get('files', {}):
+                    atomic_write(self._path(variant), compress())
+                files[variant] = data_hash
+        if not brotli and os.path.exists(self._path(name + '.br')):
+            os.remove(self._path(name + '.br'))  # stale, from a build that had brotli
+        
+        # The page and the builder's own outputs are never taken for assets
+        exclude = [self.output_dir, self.source, os.path.join(self.base_dir, name)]
+        with metrics.timer('build_assets'):
+            assets = self._link_assets(collect_assets(text, self.base_dir, exclude), manifest.get('assets', {}))
+        
+        sizes = {variant: os.path.getsize(self._path(variant)) for variant in files}
+        atomic_write(self._path(MANIFEST_NAME), json.dumps(
+            {'source': source_hash, 'stages': stages, 'files': files, 'assets': assets}, indent=2))
+        return {
+            'skipped': False,
+            'source_bytes': len(source),
+            'sizes': sizes,
+            'assets': len(assets),
+            'note': note,
+            'tailwind': tailwind,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            'completed_at': datetime.now().isoformat(),
+        }
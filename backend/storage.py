@@ -0,0 +1,480 @@
+import json
+import os
+import sqlite3
+import threading
+from atomic_file import file_lock
+from content_store import ContentStore, serialize_json
+from metrics import metrics
+from query_index import CollectionIndex, encode_cursor
+
+# Collection name -> indexed record fields (own column in SQLite), usable by query()
+COLLECTIONS = {
+    'reviews': ['rating', 'created_at'],
+    'faqs': ['created_at'],
+    'gallery': ['category', 'created_at'],
+    'reels': ['created_at'],
+}
+
+def _check_collection(collection):
+    if collection not in COLLECTIONS:
+        raise ValueError(f"Unknown collection '{collection}'")
+
+class JSONStorage:
+    """Collections stored as JSON arrays in data/<collection>.json
+    
+    In memory each collection is held as an id-keyed dict (in file order), so
+    lookups and id checks are O(1). Ids come from a per-collection counter
+    persisted in data/counters.json and are never reused after a delete.
+    Every read-modify-write holds the collection's file lock, so several
+    worker processes can share the data directory.
+    """
+    
+    def __init__(self, data_dir, content_store=None):
+        self.data_dir = data_dir
+        self.content_store = content_store or ContentStore()
+        self.counters_file = os.path.join(data_dir, 'counters.json')
+        self._write_lock = threading.RLock()
+        os.makedirs(data_dir, exist_ok=True)
+        
+        # Initialize JSON files if they don't exist
+        for collection in COLLECTIONS:
+            if not os.path.exists(self.path(collection)):
+                self.content_store.save(self.path(collection), [])
+    
+    def path(self, collection):
+        """Data file of a collection"""
+        _check_collection(collection)
+        return os.path.join(self.data_dir, f'{collection}.json')
+    
+    def _by_id(self, collection):
+        """Id-keyed view of a collection, built once per file change. Shared, do not modify"""
+        by_id = self.content_store.derive(
+            self.path(collection), 'by_id',
+            lambda items: {item['id']: item for item in items}
+        )
+        if len(by_id) < len(self.content_store.get(self.path(collection))):
+            by_id = self._renumber_duplicates(collection)
+        return by_id
+    
+    def _renumber_duplicates(self, collection):
+        """Give records that repeat an earlier id (left by older versions) a fresh id, so no write drops them"""
+        with self._write_lock, file_lock(self.path(collection)):
+            items = self.content_store.load(self.path(collection))
+            by_id, duplicates = {}, []
+            for item in items:
+                if item['id'] in by_id:
+                    duplicates.append(item)
+                else:
+                    by_id[item['id']] = item
+            if duplicates:
+                next_id = self._reserve_ids(collection, by_id, len(duplicates))
+                for item in duplicates:
+                    item['id'] = next_id
+                    by_id[next_id] = item
+                    next_id += 1
+                self._save(collection, by_id, CollectionIndex(COLLECTIONS[collection], list(by_id.values())))
+        return by_id
+    
+    def _index(self, collection):
+        """Sorted views of a collection for query(), built once per file change. Shared, do not modify"""
+        return self.content_store.derive(
+            self.path(collection), 'index',
+            lambda items: CollectionIndex(COLLECTIONS[collection], items)
+        )
+    
+    def _save(self, collection, by_id, index):
+        items = list(by_id.values())
+        self.content_store.save(self.path(collection), items, derived={'by_id': by_id, 'index': index})
+    
+    def _reserve_ids(self, collection, by_id, count=1):
+        """Allocate `count` consecutive ids from the persisted counter, returns the first
+        
+        Never hands out an id in by_id, e.g. one added to the file by hand past the counter.
+        """
+        with file_lock(self.counters_file):
+            counters = self.content_store.load(self.counters_file, default={})
+            last_id = max(counters.get(collection, 0), max(by_id, default=0))
+            counters[collection] = last_id + count
+            self.content_store.save(self.counters_file, counters)
+        return last_id + 1
+    
+    def list(self, collection, **filters):
+        """All records of a collection in insertion order. Shared, do not modify"""
+        items = self.content_store.get(self.path(collection))
+        if filters:
+            items = [item for item in items if all(item.get(k) == v for k, v in filters.items())]
+        return items
+    
+    def list_json(self, collection):
+        """JSON body of a whole collection"""
+        return self.content_store.get_json(self.path(collection))
+    
+    def version(self, collection):
+        """Token that changes whenever the collection is written"""
+        return self.content_store.version(self.path(collection))
+    
+    def query(self, collection, equals=None, minimum=None, sort='id', descending=False, offset=0, limit=None, after=None):
+        """One page of records matching equality/minimum filters on indexed fields
+        
+        Served from the collection's sorted indexes. `after` is a (value, id)
+        cursor position. Returns (items, total matches, cursor of the next page
+        or None). Items are shared, do not modify.
+        """
+        by_id = self._by_id(collection)
+        ids, total, more = self._index(collection).query(equals, minimum, sort, descending, offset, limit, after)
+        items = [by_id[item_id] for item_id in ids if item_id in by_id]
+        next_cursor = encode_cursor(sort, items[-1].get(sort), items[-1]['id']) if more and items else None
+        return items, total, next_cursor
+    
+    def get(self, collection, item_id):
+        """A single record, or None"""
+        item = self._by_id(collection).get(item_id)
+        return dict(item) if item else None
+    
+    def insert(self, collection, item):
+        """Add a record, assigning its id"""
+        with self._write_lock, file_lock(self.path(collection)):
+            by_id = dict(self._by_id(collection))
+            index = self._index(collection).copy()
+            item = {'id': self._reserve_ids(collection, by_id), **item}
+            by_id[item['id']] = item
+            index.add(item)
+            self._save(collection, by_id, index)
+        return item
+    
+    def update(self, collection, item_id, fields):
+        """Merge fields into a record. Returns the updated record, or None"""
+        with self._write_lock, file_lock(self.path(collection)):
+            by_id = dict(self._by_id(collection))
+            if item_id not in by_id:
+                return None
+            index = self._index(collection).copy()
+            item = {**by_id[item_id], **fields, 'id': item_id}
+            index.replace(by_id[item_id], item)
+            by_id[item_id] = item
+            self._save(collection, by_id, index)
+        return item
+    
+    def delete(self, collection, item_id):
+        """Remove a record. Returns False if it did not exist"""
+        with self._write_lock, file_lock(self.path(collection)):
+            by_id = dict(self._by_id(collection))
+            item = by_id.pop(item_id, None)
+            if item is None:
+                return False
+            index = self._index(collection).copy()
+            index.remove(item)
+            self._save(collection, by_id, index)
+        return True
+    
+    def apply_batch(self, collection, operations):
+        """Apply several operations with a single file write
+        
+        operations are ('create', fields), ('update', id, fields) or
+        ('delete', id) tuples. Returns one result per operation: the created or
+        updated record, {'id': id} for a delete, or None if the id was missing.
+        """
+        with self._write_lock, file_lock(self.path(collection)):
+            by_id = dict(self._by_id(collection))
+            index = self._index(collection).copy()
+            creates = sum(1 for operation in operations if operation[0] == 'create')
+            next_id = self._reserve_ids(collection, by_id, creates) if creates else None
+            
+            results = []
+            for operation in operations:
+                if operation[0] == 'create':
+                    item = {'id': next_id, **operation[1]}
+                    next_id += 1
+                    by_id[item['id']] = item
+                    index.add(item)
+                    results.append(item)
+                elif operation[0] == 'update':
+                    item_id, fields = operation[1], operation[2]
+                    if item_id not in by_id:
+                        results.append(None)
+                        continue
+                    item = {**by_id[item_id], **fields, 'id': item_id}
+                    index.replace(by_id[item_id], item)
+                    by_id[item_id] = item
+                    results.append(item)
+                elif operation[0] == 'delete':
+                    item_id = operation[1]
+                    item = by_id.pop(item_id, None)
+                    if item is not None:
+                        index.remove(item)
+                    results.append({'id': item_id} if item is not None else None)
+                else:
+                    raise ValueError(f"Unknown operation '{operation[0]}'")
+            
+            self._save(collection, by_id, index)
+        return results
+
+class SQLiteStorage:
+    """Collections stored in a SQLite database, one table per collection
+    
+    Records are kept as JSON documents keyed by an INTEGER PRIMARY KEY, with
+    the fields listed in COLLECTIONS copied into indexed columns, which
+    query() filters and sorts on. The database runs in WAL mode so readers
+    never block the writer.
+    """
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._writes = 0
+        self._collection_writes = dict.fromkeys(COLLECTIONS, 0)
+        self._cache = {}
+        self._create_tables()
+    
+    def _create_tables(self):
+        with self._lock, self._conn:
+            for collection, columns in COLLECTIONS.items():
+                # Untyped columns keep numbers numeric, so ratings compare as numbers
+                extra = ''.join(f', {column}' for column in columns)
+                self._conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {collection} '
+                    f'(id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL{extra})'
+                )
+                # Databases created before a field was indexed get the column added and filled in
+                existing = {row[1] for row in self._conn.execute(f'PRAGMA table_info({collection})')}
+                for column in columns:
+                    if column not in existing:
+                        self._conn.execute(f'ALTER TABLE {collection} ADD COLUMN {column}')
+                        self._conn.execute(f"UPDATE {collection} SET {column} = json_extract(data, '$.{column}')")
+                for column in columns:
+                    self._conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS idx_{collection}_{column} ON {collection} ({column})'
+                    )
+    
+    def _version(self):
+        """Changes whenever this or any other connection commits"""
+        data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+        return (data_version, self._writes)
+    
+    def _wrote(self, collection):
+        self._writes += 1
+        self._collection_writes[collection] += 1
+    
+    def _row_to_item(self, row):
+        return {'id': row[0], **json.loads(row[1])}
+    
+    def _columns(self, collection, item):
+        return [item.get(column) for column in COLLECTIONS[collection]]
+    
+    def _cached_list(self, collection):
+        """Cache entry holding the full collection, reloaded after any commit"""
+        version = self._version()
+        entry = self._cache.get(collection)
+        if entry is None or entry['version'] != version:
+            with metrics.timer('sqlite_load'):
+                rows = self._conn.execute(f'SELECT id, data FROM {collection} ORDER BY id').fetchall()
+                entry = {'version': version, 'items': [self._row_to_item(row) for row in rows], 'body': None}
+            self._cache[collection] = entry
+        return entry
+    
+    def list(self, collection, **filters):
+        """All records of a collection in insertion order. Shared, do not modify"""
+        _check_collection(collection)
+        with self._lock:
+            if not filters:
+                return self._cached_list(collection)['items']
+            
+            for column in filters:
+                if column not in COLLECTIONS[collection]:
+                    raise ValueError(f"'{column}' is not an indexed field of {collection}")
+            where = ' AND '.join(f'{column} = ?' for column in filters)
+            rows = self._conn.execute(
+                f'SELECT id, data FROM {collection} WHERE {where} ORDER BY id',
+                list(filters.values())
+            ).fetchall()
+            return [self._row_to_item(row) for row in rows]
+    
+    def version(self, collection):
+        """Token that changes whenever this connection writes the collection or another connection commits"""
+        _check_collection(collection)
+        with self._lock:
+            data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+            return (data_version, self._collection_writes[collection])
+    
+    def query(self, collection, equals=None, minimum=None, sort='id', descending=False, offset=0, limit=None, after=None):
+        """One page of records matching equality/minimum filters (see JSONStorage.query)"""
+        _check_collection(collection)
+        conditions = [(column, '=', value) for column, value in (equals or {}).items()]
+        conditions += [(column, '>=', value) for column, value in (minimum or {}).items()]
+        for column, _, _ in conditions:
+            if column not in COLLECTIONS[collection]:
+                raise ValueError(f"Cannot filter on '{column}'")
+        if sort != 'id' and sort not in COLLECTIONS[collection]:
+            raise ValueError(f"Cannot sort by '{sort}'")
+        
+        where = [f'{column} {operator} ?' for column, operator, _ in conditions]
+        params = [value for _, _, value in conditions]
+        with self._lock:
+            total = self._conn.execute(
+                f'SELECT COUNT(*) FROM {collection}' + (' WHERE ' + ' AND '.join(where) if where else ''), params
+            ).fetchone()[0]
+            
+            if after is not None:
+                value, item_id = after
+                if sort == 'id':
+                    where.append('id < ?' if descending else 'id > ?')
+                    params.append(item_id)
+                elif value is None:
+                    # NULLs sort first
+                    where.append(f'({sort} IS NULL AND id < ?)' if descending
+                                 else f'(({sort} IS NULL AND id > ?) OR {sort} IS NOT NULL)')
+                    params.append(item_id)
+                else:
+                    where.append(f'(({sort}, id) < (?, ?) OR {sort} IS NULL)' if descending else f'({sort}, id) > (?, ?)')
+                    params += [value, item_id]
+            
+            direction = 'DESC' if descending else 'ASC'
+            order = 'id' if sort == 'id' else f'{sort} {direction}, id'
+            rows = self._conn.execute(
+                f'SELECT id, data FROM {collection}' + (' WHERE ' + ' AND '.join(where) if where else '')
+                + f' ORDER BY {order} {direction} LIMIT ? OFFSET ?',
+                params + [-1 if limit is None else limit + 1, offset]
+            ).fetchall()
+        
+        items = [self._row_to_item(row) for row in rows]
+        more = limit is not None and len(items) > limit
+        items = items[:limit]
+        next_cursor = encode_cursor(sort, items[-1].get(sort), items[-1]['id']) if more and items else None
+        return items, total, next_cursor
+    
+    def list_json(self, collection):
+        """JSON body of a whole collection"""
+        _check_collection(collection)
+        with self._lock:
+            entry = self._cached_list(collection)
+            if entry['body'] is None:
+                with metrics.timer('json_serialize'):
+                    entry['body'] = serialize_json(entry['items'])
+            return entry['body']
+    
+    def get(self, collection, item_id):
+        """A single record, or None"""
+        _check_collection(collection)
+        with self._lock:
+            row = self._conn.execute(f'SELECT id, data FROM {collection} WHERE id = ?', (item_id,)).fetchone()
+        return self._row_to_item(row) if row else None
+    
+    def insert(self, collection, item):
+        """Add a record, assigning its id"""
+        _check_collection(collection)
+        data = {k: v for k, v in item.items() if k != 'id'}
+        columns = ''.join(f', {column}' for column in COLLECTIONS[collection])
+        placeholders = ', ?' * len(COLLECTIONS[collection])
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f'INSERT INTO {collection} (data{columns}) VALUES (?{placeholders})',
+                [json.dumps(data, ensure_ascii=False)] + self._columns(collection, data)
+            )
+            self._wrote(collection)
+        return {'id': cursor.lastrowid, **data}
+    
+    def update(self, collection, item_id, fields):
+        """Merge fields into a record. Returns the updated record, or None"""
+        _check_collection(collection)
+        with self._lock, self._conn:
+            row = self._conn.execute(f'SELECT id, data FROM {collection} WHERE id = ?', (item_id,)).fetchone()
+            if not row:
+                return None
+            item = self._row_to_item(row)
+            item.update({k: v for k, v in fields.items() if k != 'id'})
+            data = {k: v for k, v in item.items() if k != 'id'}
+            assignments = ''.join(f', {column} = ?' for column in COLLECTIONS[collection])
+            self._conn.execute(
+                f'UPDATE {collection} SET data = ?{assignments} WHERE id = ?',
+                [json.dumps(data, ensure_ascii=False)] + self._columns(collection, data) + [item_id]
+            )
+            self._wrote(collection)
+        return item
+    
+    def delete(self, collection, item_id):
+        """Remove a record. Returns False if it did not exist"""
+        _check_collection(collection)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(f'DELETE FROM {collection} WHERE id = ?', (item_id,))
+            self._wrote(collection)
+        return cursor.rowcount > 0
+    
+    def apply_batch(self, collection, operations):
+        """Apply several operations in a single transaction (see JSONStorage.apply_batch)"""
+        _check_collection(collection)
+        columns = ''.join(f', {column}' for column in COLLECTIONS[collection])
+        placeholders = ', ?' * len(COLLECTIONS[collection])
+        assignments = ''.join(f', {column} = ?' for column in COLLECTIONS[collection])
+        
+        results = []
+        with self._lock, self._conn:
+            for operation in operations:
+                if operation[0] == 'create':
+                    data = {k: v for k, v in operation[1].items() if k != 'id'}
+                    cursor = self._conn.execute(
+                        f'INSERT INTO {collection} (data{columns}) VALUES (?{placeholders})',
+                        [json.dumps(data, ensure_ascii=False)] + self._columns(collection, data)
+                    )
+                    results.append({'id': cursor.lastrowid, **data})
+                elif operation[0] == 'update':
+                    item_id, fields = operation[1], operation[2]
+                    row = self._conn.execute(f'SELECT id, data FROM {collection} WHERE id = ?', (item_id,)).fetchone()
+                    if not row:
+                        results.append(None)
+                        continue
+                    item = self._row_to_item(row)
+                    item.update({k: v for k, v in fields.items() if k != 'id'})
+                    data = {k: v for k, v in item.items() if k != 'id'}
+                    self._conn.execute(
+                        f'UPDATE {collection} SET data = ?{assignments} WHERE id = ?',
+                        [json.dumps(data, ensure_ascii=False)] + self._columns(collection, data) + [item_id]
+                    )
+                    results.append(item)
+                elif operation[0] == 'delete':
+                    item_id = operation[1]
+                    cursor = self._conn.execute(f'DELETE FROM {collection} WHERE id = ?', (item_id,))
+                    results.append({'id': item_id} if cursor.rowcount else None)
+                else:
+                    raise ValueError(f"Unknown operation '{operation[0]}'")
+            self._wrote(collection)
+        return results
+    
+    def count(self, collection):
+        _check_collection(collection)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM {collection}').fetchone()[0]
+    
+    def import_items(self, collection, items, last_id=0):
+        """Insert records keeping their existing ids (used by the JSON migrator)
+        
+        last_id is the highest id ever handed out, so ids of records deleted
+        before the migration are not reused either.
+        """
+        _check_collection(collection)
+        columns = ''.join(f', {column}' for column in COLLECTIONS[collection])
+        placeholders = ', ?' * len(COLLECTIONS[collection])
+        with self._lock, self._conn:
+            for item in items:
+                data = {k: v for k, v in item.items() if k != 'id'}
+                self._conn.execute(
+                    f'INSERT OR REPLACE INTO {collection} (id, data{columns}) VALUES (?, ?{placeholders})',
+                    [item['id'], json.dumps(data, ensure_ascii=False)] + self._columns(collection, data)
+                )
+            if last_id:
+                updated = self._conn.execute(
+                    'UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?', (last_id, collection)
+                ).rowcount
+                if not updated:
+                    self._conn.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (collection, last_id))
+            self._wrote(collection)
+
+def create_storage(app_config, content_store=None):
+    """Build the storage backend selected by STORAGE_BACKEND"""
+    if app_config.STORAGE_BACKEND == 'sqlite':
+        return SQLiteStorage(app_config.SQLITE_DATABASE)
+    if app_config.STORAGE_BACKEND == 'json':
+        return JSONStorage(app_config.DATA_DIR, content_store)
+    raise ValueError(f"Unknown storage backend '{app_config.STORAGE_BACKEND}'. Use 'json' or 'sqlite'.")
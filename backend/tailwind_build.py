@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+
+from atomic_file import atomic_write
+from metrics import metrics
+
+# The Play CDN script that compiles Tailwind in the visitor's browser
+CDN_SCRIPT_PATTERN = re.compile(
+    r'<script\b[^>]*\bsrc\s*=\s*["\']https?://cdn\.tailwindcss\.com[^"\']*["\'][^>]*>\s*</script>',
+    re.IGNORECASE
+)
+# Runtime configuration and <style type="text/tailwindcss"> blocks for the CDN script, which a build cannot see reliably
+INLINE_CONFIG_PATTERN = re.compile(r'\btailwind\.config\s*=|type\s*=\s*["\']?text/tailwindcss', re.IGNORECASE)
+LOCAL_SCRIPT_PATTERN = re.compile(r'<script\b[^>]*\bsrc\s*=\s*["\'](?![a-z]+:|//)([^"\'?#]+)', re.IGNORECASE)
+INLINE_SCRIPT_PATTERN = re.compile(r'<script\b(?![^>]*\b(?:src\s*=|type\s*=\s*["\']?application/(?:ld\+)?json))[^>]*>(.*?)</script\s*>',
+                                   re.IGNORECASE | re.DOTALL)
+CLASS_ATTRIBUTE_PATTERN = re.compile(r'\sclass\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.IGNORECASE)
+
+# Like Tailwind's own extractor: every token in a script that could be a class name
+CANDIDATE_PATTERN = re.compile(r'[^<>"\'`\s=]*[^<>"\'`\s=:]')
+
+INPUT_CSS = '@tailwind base;\n@tailwind components;\n@tailwind utilities;\n'
+
+def class_candidates(html, scripts=()):
+    """Class names of a page: its class attributes, plus every token of its scripts
+    
+    Scripts may add classes at runtime (classList.add('hidden')), so their
+    tokens count too. Page text does not, so editing a review only changes
+    the class set if the cards use new classes.
+    """
+    candidates = set()
+    for match in CLASS_ATTRIBUTE_PATTERN.finditer(html):
+        candidates.update((match.group(1) or match.group(2) or '').split())
+    for script in INLINE_SCRIPT_PATTERN.findall(html) + list(scripts):
+        candidates.update(CANDIDATE_PATTERN.findall(script))
+    return candidates
+
+def class_set_hash(candidates):
+    return hashlib.sha256('\n'.join(sorted(candidates)).encode('utf-8')).hexdigest()
+
+def find_cli(command=None):
+    """Argument list of the Tailwind CLI: `command` if given, else a `tailwindcss` binary on PATH"""
+    if command:
+        return shlex.split(command)
+    path = shutil.which('tailwindcss')
+    return [path] if path else None
+
+class TailwindBuild:
+    """Replaces the Tailwind CDN script with a static, purged stylesheet
+    
+    The classes a page can use are collected from its markup and its local
+    scripts, and the Tailwind CLI compiles a minified stylesheet containing
+    only those. The stylesheet is named after the hash of the class set, so
+    it is compiled once per distinct set, and a page re-rendered with the
+    same classes reuses it.
+    
+    Without the CLI (or with inline Tailwind configuration the build cannot
+    reproduce) the page keeps the CDN script, so it never loses its styles.
+    """
+    
+    def __init__(self, output_dir, command=None, timeout=120):
+        self.output_dir = output_dir
+        self.cli = find_cli(command)
+        self.timeout = timeout
+    
+    def _local_scripts(self, html, base_dir):
+        texts = []
+        for src in LOCAL_SCRIPT_PATTERN.findall(html):
+            try:
+                with open(os.path.join(base_dir, src), 'r', encoding='utf-8') as f:
+                    texts.append(f.read())
+            except (OSError, UnicodeDecodeError):
+                pass
+        return texts
+    
+    def _compile(self, candidates, path):
+        with tempfile.TemporaryDirectory() as workdir:
+            content = os.path.join(workdir, 'classes.txt')
+            source = os.path.join(workdir, 'input.css')
+            output = os.path.join(workdir, 'output.css')
+            with open(content, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(sorted(candidates)))
+            with open(source, 'w', encoding='utf-8') as f:
+                f.write(INPUT_CSS)
+            try:
+                subprocess.run(
+                    self.cli + ['-i', source, '-o', output, '--content', content, '--minify'],
+                    capture_output=True, text=True, check=True, timeout=self.timeout
+                )
+            except subprocess.CalledProcessError as e:
+                raise Exception(f"Tailwind CLI failed: {(e.stderr or str(e)).strip()}")
+            except (OSError, subprocess.TimeoutExpired) as e:
+                raise Exception(f"Tailwind CLI failed: {e}")
+            with open(output, 'rb') as f:
+                css = f.read()
+        atomic_write(path, css)
+        atomic_write(path + '.gz', gzip.compress(css, compresslevel=9, mtime=0))
+    
+    def _prune(self, keep):
+        """Remove stylesheets of class sets no page uses anymore"""
+        for name in os.listdir(self.output_dir):
+            if name.startswith('tailwind.') and not name.startswith(keep):
+                os.remove(os.path.join(self.output_dir, name))
+    
+    def apply(self, html, base_dir):
+        """(page with the CDN script swapped for the stylesheet, report); the page is unchanged if that is not possible"""
+        match = CDN_SCRIPT_PATTERN.search(html)
+        if not match:
+            return html, None
+        if INLINE_CONFIG_PATTERN.search(html):
+            return html, {'note': 'inline Tailwind configuration found, kept the CDN script'}
+        if not self.cli:
+            return html, {'note': 'Tailwind CLI not found, kept the CDN script'}
+        
+        candidates = class_candidates(html, self._local_scripts(html, base_dir))
+        name = f'tailwind.{class_set_hash(candidates)[:16]}.css'
+        path = os.path.join(self.output_dir, name)
+        cached = os.path.exists(path) and os.path.exists(path + '.gz')
+        if not cached:
+            os.makedirs(self.output_dir, exist_ok=True)
+            try:
+                with metrics.timer('build_tailwind'):
+                    self._compile(candidates, path)
+            except Exception as e:
+                return html, {'note': f'{e}, kept the CDN script'}
+            self._prune(name)
+        
+        link = f'<link rel="stylesheet" href="{name}">'
+        html = html[:match.start()] + link + html[match.end():]
+        return html, {'stylesheet': name, 'candidates': len(candidates), 'cached': cached}